@@ -7,11 +7,12 @@ from starlette import status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from auth.helpers import TOKEN_TYPE_FIELD, ACCESS_TOKEN_TYPE, REFRESH_TOKEN_TYPE
+from auth.pool import PASSWORD_POOL, PoolOverloadedError
 from auth.utils import validate_password, decode_jwt
 from dependencies import user_service
 from log_config import add_logger
 from models.users import User
-from schemas.users import UserCreateSchema
+from schemas.users import UserCreateSchema, PrincipalSchema
 from services.users import UserService
 
 logger = add_logger(__name__)
@@ -44,7 +45,16 @@ async def validate_auth_user(
             func,
         )
         raise un_authed_exc
-    if not validate_password(data.password, user.password):
+    try:
+        valid = await PASSWORD_POOL.run(validate_password, data.password, user.password)
+    except PoolOverloadedError as exc:
+        logger.warning("Password was not checked in %s function %s", func, exc)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, try again later.",
+            headers={"Retry-After": "1"},
+        )
+    if not valid:
         logger.debug(
             "Invalid password %s during validation in %s function",
             data.password,
@@ -83,9 +93,11 @@ async def check_valid_token(token: str) -> dict:
     return payload
 
 
-async def get_user_payload(payload: dict, user_services: UserService) -> User:
-    """Checking the user's existence in the database when comparing data from the jwt token"""
-    user = await user_services.get_user(payload.get("username"))
+async def get_user_payload(
+    payload: dict, user_services: UserService
+) -> PrincipalSchema:
+    """Checking the user's existence when comparing data from the jwt token"""
+    user = await user_services.get_principal(payload.get("username"))
     if user is None:
         logger.debug("User is not found was gotten %s", payload.get("username"))
         raise HTTPException(
@@ -98,7 +110,7 @@ async def get_user_payload(payload: dict, user_services: UserService) -> User:
 async def validate_access_token(
     user_services: Annotated[UserService, Depends(user_service)],
     credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
-) -> User:
+) -> PrincipalSchema:
     """Access token verification"""
     token = credentials.credentials
     payload = await check_valid_token(token)
@@ -110,7 +122,7 @@ async def validate_access_token(
 async def validate_refresh_token(
     user_services: Annotated[UserService, Depends(user_service)],
     credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
-) -> User:
+) -> PrincipalSchema:
     """Checking the refresh token"""
     token = credentials.credentials
     payload = await check_valid_token(token)
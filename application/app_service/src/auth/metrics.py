@@ -0,0 +1,14 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+POOL_CAPACITY = Gauge(
+    "blocking_pool_capacity", "Calls a blocking pool accepts at once", ["pool"]
+)
+POOL_PENDING = Gauge(
+    "blocking_pool_pending", "Calls running or queued in a blocking pool", ["pool"]
+)
+POOL_REJECTED = Counter(
+    "blocking_pool_rejected_total", "Calls rejected by a full blocking pool", ["pool"]
+)
+POOL_WAIT_SECONDS = Histogram(
+    "blocking_pool_wait_seconds", "Time a call waits for a blocking pool", ["pool"]
+)
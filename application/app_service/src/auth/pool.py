@@ -0,0 +1,60 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from auth.metrics import POOL_CAPACITY, POOL_PENDING, POOL_REJECTED, POOL_WAIT_SECONDS
+from env_config import settings
+
+
+class PoolOverloadedError(Exception):
+    """The pool has no free place for a call"""
+
+
+class BoundedThreadPool:
+    """
+    A class that runs blocking calls on a dedicated thread pool, so they do not
+    stall the event loop. At most max_workers calls run and max_queue wait,
+    further calls are rejected at once instead of piling up
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int) -> None:
+        self.name = name
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self.capacity = max_workers + max_queue
+        self.pending = 0
+        POOL_CAPACITY.labels(name).set(self.capacity)
+
+    def _release(self) -> None:
+        self.pending -= 1
+        POOL_PENDING.labels(self.name).dec()
+
+    def _timed(self, func: Callable, queued: float) -> Callable:
+        def call(*args) -> Any:
+            POOL_WAIT_SECONDS.labels(self.name).observe(time.perf_counter() - queued)
+            return func(*args)
+
+        return call
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        The method of running a blocking call on the pool, raises
+        PoolOverloadedError when the pool is full
+        """
+        if self.pending >= self.capacity:
+            POOL_REJECTED.labels(self.name).inc()
+            raise PoolOverloadedError(f"The {self.name} pool is overloaded.")
+        loop = asyncio.get_running_loop()
+        future = self.executor.submit(self._timed(func, time.perf_counter()), *args)
+        self.pending += 1
+        POOL_PENDING.labels(self.name).inc()
+        # A place is freed when the thread is done, not when the caller gives up
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(future)
+
+
+PASSWORD_POOL = BoundedThreadPool(
+    "password",
+    settings.auth_jwt.password_pool_size,
+    settings.auth_jwt.password_queue_size,
+)
@@ -13,17 +13,16 @@ class RabbitMQClient:
         self.connection = pika.BlockingConnection(self.parameters)
         self.channel = self.connection.channel()
 
-    def public_basic(
-        self, queue: str, exchange: str, route_key: str, body: str | bytes
-    ) -> None:
-        """A method that allows you to put a message in a queue"""
-        self.channel.queue_declare(queue=queue)
+    def public(self, exchange: str, route_key: str, body: str | bytes) -> None:
+        """
+        A method that puts a message in a declared queue and keeps
+        the connection open for the next messages
+        """
         self.channel.basic_publish(
             exchange=exchange,
             routing_key=route_key,
             body=body,
         )
-        self.close()
 
     def close(self):
         """Connection closing method"""
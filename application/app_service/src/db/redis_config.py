@@ -0,0 +1,5 @@
+import aioredis
+
+from env_config import settings
+
+redis = aioredis.from_url(f"redis://{settings.redis.redis_host}")
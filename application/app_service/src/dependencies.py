@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.db_config import async_session
 from services.comments import CommentService
+from services.feed import FeedService
 from services.followers import FollowerService
 from services.images import ImageService
 from services.posts import PostService
@@ -49,3 +50,10 @@ def image_service(
 ) -> ImageService:
     """A function that performs the logic of the image service"""
     return ImageService(session)
+
+
+def feed_service(
+    session: Annotated[AsyncGenerator[AsyncSession, Any], Depends(db)]
+) -> FeedService:
+    """A function that performs the logic of the feed service"""
+    return FeedService(session)
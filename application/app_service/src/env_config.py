@@ -13,6 +13,11 @@ class AuthJWT(BaseModel):
     algorithm: str = "RS256"
     access_token_expire_minutes: int = 45
     refresh_token_expire_days: int = 30
+    principal_cache_size: int = 10000
+    principal_local_ttl: int = 30
+    principal_ttl: int = 600
+    password_pool_size: int = 4
+    password_queue_size: int = 32
 
 
 class MediaConf(BaseModel):
@@ -32,9 +37,41 @@ class RedisConf(BaseModel):
     redis_host: str = "localhost"
 
 
+class FeedConf(BaseModel):
+    timeline_max_length: int = 800
+    fanout_batch_size: int = 1000
+    fanout_max_followers: int = 10000
+
+
+class TrendingConf(BaseModel):
+    window_hours: int = 72
+    half_life_hours: float = 12
+    karma_weight: float = 0.5
+    view_weight: float = 1.0
+    size: int = 500
+
+
+class WorkerConf(BaseModel):
+    batch_size: int = 1000
+    counters_flush_interval: int = 5
+    counters_reconcile_interval: int = 3600
+    views_flush_interval: int = 30
+    publish_interval: int = 5
+    purge_interval: int = 600
+    purge_batch_size: int = 500
+    purge_batch_pause: float = 0.1
+    trash_retention_days: int = 30
+    trending_interval: int = 300
+    follow_lists_rebuild_interval: int = 86400
+    suggestions_interval: int = 86400
+    suggestions_size: int = 20
+    metrics_port: int = 8002
+
+
 class RabbitMQConf(BaseModel):
     rabbitmq_host: str = "localhost"
     rabbitmq_port: str = 5672
+    email_batch_size: int = 500
 
 
 class Settings(BaseSettings):
@@ -48,6 +85,9 @@ class Settings(BaseSettings):
     postgres: PostgresConf = PostgresConf()
     redis: RedisConf = RedisConf()
     rabbitmq: RabbitMQConf = RabbitMQConf()
+    feed: FeedConf = FeedConf()
+    trending: TrendingConf = TrendingConf()
+    worker: WorkerConf = WorkerConf()
 
 
 settings = Settings()
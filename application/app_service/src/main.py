@@ -1,15 +1,32 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from prometheus_fastapi_instrumentator import Instrumentator
 from routers.posts import router as post_router
 from routers.users import router as user_router
 from routers.followers import router as follower_router
 from routers.comments import router as comment_router
+from routers.feed import router as feed_router
+from routers.profiles import router as profile_router
+from utils.principals import PRINCIPALS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Listening to the changes of users for the lifetime of the application"""
+    listener = asyncio.create_task(PRINCIPALS.listen())
+    yield
+    listener.cancel()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(post_router)
 app.include_router(user_router)
 app.include_router(follower_router)
 app.include_router(comment_router)
+app.include_router(feed_router)
+app.include_router(profile_router)
 
 Instrumentator().instrument(app).expose(app)
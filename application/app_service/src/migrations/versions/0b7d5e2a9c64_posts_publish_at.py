@@ -0,0 +1,30 @@
+"""posts publish at
+
+Revision ID: 0b7d5e2a9c64
+Revises: d3a98c5e7b21
+Create Date: 2026-10-18 17:12:05.617930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7d5e2a9c64'
+down_revision: Union[str, None] = 'd3a98c5e7b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('publish_at', sa.DateTime(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_posts_future_publish_at', 'posts', ['publish_at'], unique=False, postgresql_where=sa.text("status = 'FUTURE'"), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_future_publish_at', table_name='posts', postgresql_where=sa.text("status = 'FUTURE'"), postgresql_concurrently=True)
+    op.drop_column('posts', 'publish_at')
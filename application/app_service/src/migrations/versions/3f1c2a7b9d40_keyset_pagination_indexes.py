@@ -0,0 +1,33 @@
+"""keyset pagination indexes
+
+Revision ID: 3f1c2a7b9d40
+Revises: 8d089d3e591d
+Create Date: 2026-10-18 10:02:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7b9d40'
+down_revision: Union[str, None] = '8d089d3e591d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so that existing large tables are not locked for writes
+    with op.get_context().autocommit_block():
+        op.create_index('ix_posts_date_id', 'posts', ['date', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_posts_status_date_id', 'posts', ['status', 'date', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_comments_author_id_date_id', 'comments', ['author_id', 'date', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_comments_author_id_date_id', table_name='comments', postgresql_concurrently=True)
+        op.drop_index('ix_posts_status_date_id', table_name='posts', postgresql_concurrently=True)
+        op.drop_index('ix_posts_date_id', table_name='posts', postgresql_concurrently=True)
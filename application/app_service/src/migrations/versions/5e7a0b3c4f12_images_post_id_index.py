@@ -0,0 +1,28 @@
+"""images post id index
+
+Revision ID: 5e7a0b3c4f12
+Revises: c52d9e1f8a73
+Create Date: 2026-10-18 13:55:12.004387
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e7a0b3c4f12'
+down_revision: Union[str, None] = 'c52d9e1f8a73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_images_post_id'), 'images', ['post_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_images_post_id'), table_name='images', postgresql_concurrently=True)
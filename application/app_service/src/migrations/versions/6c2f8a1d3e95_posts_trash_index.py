@@ -0,0 +1,28 @@
+"""posts trash index
+
+Revision ID: 6c2f8a1d3e95
+Revises: 0b7d5e2a9c64
+Create Date: 2026-10-18 18:26:40.112853
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c2f8a1d3e95'
+down_revision: Union[str, None] = '0b7d5e2a9c64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_posts_trash_modified', 'posts', ['modified'], unique=False, postgresql_where=sa.text("status = 'TRASH'"), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_trash_modified', table_name='posts', postgresql_where=sa.text("status = 'TRASH'"), postgresql_concurrently=True)
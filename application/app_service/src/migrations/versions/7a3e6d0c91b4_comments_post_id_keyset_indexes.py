@@ -0,0 +1,32 @@
+"""comments post_id keyset indexes
+
+Revision ID: 7a3e6d0c91b4
+Revises: e4b19c7a2f06
+Create Date: 2026-10-18 19:31:48.206713
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3e6d0c91b4'
+down_revision: Union[str, None] = 'e4b19c7a2f06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_comments_post_id_date_id', 'comments', ['post_id', 'date', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_comments_post_id_karma_id', 'comments', ['post_id', 'karma', 'id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_comments_post_id', table_name='comments', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_comments_post_id', 'comments', ['post_id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_comments_post_id_karma_id', table_name='comments', postgresql_concurrently=True)
+        op.drop_index('ix_comments_post_id_date_id', table_name='comments', postgresql_concurrently=True)
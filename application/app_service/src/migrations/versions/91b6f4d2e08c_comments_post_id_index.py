@@ -0,0 +1,28 @@
+"""comments post id index
+
+Revision ID: 91b6f4d2e08c
+Revises: 5e7a0b3c4f12
+Create Date: 2026-10-18 15:21:47.390518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '91b6f4d2e08c'
+down_revision: Union[str, None] = '5e7a0b3c4f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_comments_post_id'), 'comments', ['post_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_comments_post_id'), table_name='comments', postgresql_concurrently=True)
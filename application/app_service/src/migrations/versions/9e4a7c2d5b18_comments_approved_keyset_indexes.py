@@ -0,0 +1,34 @@
+"""comments approved keyset indexes
+
+Revision ID: 9e4a7c2d5b18
+Revises: f2c8e6a41d07
+Create Date: 2026-10-18 21:26:03.571942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4a7c2d5b18'
+down_revision: Union[str, None] = 'f2c8e6a41d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_comments_approved_post_id_date_id', 'comments', ['post_id', 'date', 'id'], unique=False, postgresql_where=sa.text('approved'), postgresql_concurrently=True)
+        op.create_index('ix_comments_approved_post_id_karma_id', 'comments', ['post_id', 'karma', 'id'], unique=False, postgresql_where=sa.text('approved'), postgresql_concurrently=True)
+        op.drop_index('ix_comments_post_id_karma_id', table_name='comments', postgresql_concurrently=True)
+        op.drop_index('ix_comments_post_id_date_id', table_name='comments', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_comments_post_id_date_id', 'comments', ['post_id', 'date', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_comments_post_id_karma_id', 'comments', ['post_id', 'karma', 'id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_comments_approved_post_id_karma_id', table_name='comments', postgresql_where=sa.text('approved'), postgresql_concurrently=True)
+        op.drop_index('ix_comments_approved_post_id_date_id', table_name='comments', postgresql_where=sa.text('approved'), postgresql_concurrently=True)
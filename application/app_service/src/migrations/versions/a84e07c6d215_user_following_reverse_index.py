@@ -0,0 +1,28 @@
+"""user following reverse index
+
+Revision ID: a84e07c6d215
+Revises: 3f1c2a7b9d40
+Create Date: 2026-10-18 11:37:09.264511
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a84e07c6d215'
+down_revision: Union[str, None] = '3f1c2a7b9d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_user_following_following_id_user_id', 'user_following', ['following_id', 'user_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_user_following_following_id_user_id', table_name='user_following', postgresql_concurrently=True)
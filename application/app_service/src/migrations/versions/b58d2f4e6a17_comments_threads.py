@@ -0,0 +1,38 @@
+"""comments threads
+
+Revision ID: b58d2f4e6a17
+Revises: 7a3e6d0c91b4
+Create Date: 2026-10-18 20:04:51.873129
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b58d2f4e6a17'
+down_revision: Union[str, None] = '7a3e6d0c91b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('comments', sa.Column('parent_id', sa.Integer(), nullable=True))
+    op.add_column('comments', sa.Column('path', sa.String(collation='C'), nullable=True))
+    op.create_foreign_key('comments_parent_id_fkey', 'comments', 'comments', ['parent_id'], ['id'], ondelete='CASCADE')
+    # The existing comments are the roots of their threads
+    op.execute("UPDATE comments SET path = lpad(id::text, 10, '0') WHERE path IS NULL")
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_comments_parent_id'), 'comments', ['parent_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_comments_path', 'comments', ['path'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_comments_path', table_name='comments', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_comments_parent_id'), table_name='comments', postgresql_concurrently=True)
+    op.drop_constraint('comments_parent_id_fkey', 'comments', type_='foreignkey')
+    op.drop_column('comments', 'path')
+    op.drop_column('comments', 'parent_id')
@@ -0,0 +1,30 @@
+"""posts search vector
+
+Revision ID: c52d9e1f8a73
+Revises: a84e07c6d215
+Create Date: 2026-10-18 12:48:55.730164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52d9e1f8a73'
+down_revision: Union[str, None] = 'a84e07c6d215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("setweight(to_tsvector('english', name), 'A') || setweight(to_tsvector('english', excerpt), 'B') || setweight(to_tsvector('english', content), 'C')", persisted=True), nullable=False))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_posts_search_vector', 'posts', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_search_vector', table_name='posts', postgresql_using='gin', postgresql_concurrently=True)
+    op.drop_column('posts', 'search_vector')
@@ -0,0 +1,26 @@
+"""posts view count
+
+Revision ID: d3a98c5e7b21
+Revises: 91b6f4d2e08c
+Create Date: 2026-10-18 16:09:33.821476
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a98c5e7b21'
+down_revision: Union[str, None] = '91b6f4d2e08c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('view_count', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('posts', 'view_count')
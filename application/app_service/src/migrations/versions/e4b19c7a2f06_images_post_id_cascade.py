@@ -0,0 +1,28 @@
+"""images post_id cascade
+
+Revision ID: e4b19c7a2f06
+Revises: 6c2f8a1d3e95
+Create Date: 2026-10-18 19:02:17.530418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b19c7a2f06'
+down_revision: Union[str, None] = '6c2f8a1d3e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('images_post_id_fkey', 'images', type_='foreignkey')
+    op.create_foreign_key('images_post_id_fkey', 'images', 'posts', ['post_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    op.drop_constraint('images_post_id_fkey', 'images', type_='foreignkey')
+    op.create_foreign_key('images_post_id_fkey', 'images', 'posts', ['post_id'], ['id'])
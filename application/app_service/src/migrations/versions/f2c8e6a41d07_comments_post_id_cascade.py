@@ -0,0 +1,28 @@
+"""comments post_id cascade
+
+Revision ID: f2c8e6a41d07
+Revises: b58d2f4e6a17
+Create Date: 2026-10-18 21:12:40.318266
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c8e6a41d07'
+down_revision: Union[str, None] = 'b58d2f4e6a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('comments_post_id_fkey', 'comments', type_='foreignkey')
+    op.create_foreign_key('comments_post_id_fkey', 'comments', 'posts', ['post_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    op.drop_constraint('comments_post_id_fkey', 'comments', type_='foreignkey')
+    op.create_foreign_key('comments_post_id_fkey', 'comments', 'posts', ['post_id'], ['id'])
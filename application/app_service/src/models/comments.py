@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, String, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import expression
 
@@ -10,12 +10,32 @@ from utils.common import TypeComment
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_author_id_date_id", "author_id", "date", "id"),
+        # Only the approved comments of a post are paged through
+        Index(
+            "ix_comments_approved_post_id_date_id",
+            "post_id",
+            "date",
+            "id",
+            postgresql_where=text("approved"),
+        ),
+        Index(
+            "ix_comments_approved_post_id_karma_id",
+            "post_id",
+            "karma",
+            "id",
+            postgresql_where=text("approved"),
+        ),
+        Index("ix_comments_path", "path"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     date: Mapped[datetime] = mapped_column(
         default=func.now(), server_default=func.now()
     )
-    karma: Mapped[int] = mapped_column(nullable=False)
+    # Changed only by folding in the votes, a new comment starts at 0
+    karma: Mapped[int] = mapped_column(nullable=False, default=0)
     content: Mapped[str] = mapped_column(nullable=False)
     approved: Mapped[bool] = mapped_column(
         server_default=expression.true(), default=True, nullable=False
@@ -24,4 +44,10 @@ class Comment(Base):
     comment_count: Mapped[int] = mapped_column(default=0)
 
     author_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
-    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id"))
+    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id", ondelete="CASCADE"))
+    parent_id: Mapped[int | None] = mapped_column(
+        ForeignKey("comments.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    # The zero-padded IDs of the ancestors and of the comment itself joined
+    # with dots, the C collation keeps a subtree a contiguous range of the index
+    path: Mapped[str | None] = mapped_column(String(collation="C"), nullable=True)
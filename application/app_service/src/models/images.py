@@ -9,4 +9,6 @@ class Image(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     image: Mapped[str]
-    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id"))
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), index=True
+    )
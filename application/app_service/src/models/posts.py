@@ -1,7 +1,8 @@
 from datetime import datetime
 from typing import List, TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import Computed, ForeignKey, Index, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship, Mapper
 
 from db.db_config import Base
@@ -15,6 +16,21 @@ if TYPE_CHECKING:
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_date_id", "date", "id"),
+        Index("ix_posts_status_date_id", "status", "date", "id"),
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_posts_future_publish_at",
+            "publish_at",
+            postgresql_where=text("status = 'FUTURE'"),
+        ),
+        Index(
+            "ix_posts_trash_modified",
+            "modified",
+            postgresql_where=text("status = 'TRASH'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     date: Mapped[datetime] = mapped_column(
@@ -30,10 +46,24 @@ class Post(Base):
     status_comment: Mapped[StatusComment] = mapped_column(default=StatusComment.OPEN)
     type: Mapped[TypePost] = mapped_column(default=TypePost.ENTERTAINMENT)
     comment_count: Mapped[int] = mapped_column(default=0)
+    view_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    publish_at: Mapped[datetime | None] = mapped_column(nullable=True)
     author_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', name), 'A')"
+            " || setweight(to_tsvector('english', excerpt), 'B')"
+            " || setweight(to_tsvector('english', content), 'C')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     comments: Mapped[List["Comment"]] = relationship()
-    images: Mapped[List["Image"]] = relationship("Image", cascade="all,delete")
+    images: Mapped[List["Image"]] = relationship(
+        "Image", cascade="all,delete", passive_deletes=True
+    )
 
     def to_dict(self):
         return {
@@ -47,5 +77,6 @@ class Post(Base):
             "status_comment": self.status_comment,
             "type": self.type,
             "comment_count": self.comment_count,
+            "view_count": self.view_count,
             "images": [i for i in self.images],
         }
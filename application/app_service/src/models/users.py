@@ -1,6 +1,6 @@
 from typing import List, TYPE_CHECKING
 
-from sqlalchemy import Table, Column, Integer, ForeignKey
+from sqlalchemy import Table, Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db.db_config import Base
@@ -21,7 +21,7 @@ class User(Base):
     following = relationship(
         "User",
         lambda: user_following,
-        lazy="selectin",
+        lazy="raise",
         primaryjoin=lambda: User.id == user_following.c.user_id,
         secondaryjoin=lambda: User.id == user_following.c.following_id,
         backref="followers",
@@ -35,4 +35,5 @@ user_following = Table(
     Base.metadata,
     Column("user_id", Integer, ForeignKey(User.id), primary_key=True),
     Column("following_id", Integer, ForeignKey(User.id), primary_key=True),
+    Index("ix_user_following_following_id_user_id", "following_id", "user_id"),
 )
@@ -25,29 +25,54 @@ class OperationCommentStrategy(BaseOperationStrategy):
     """A class that allows you to get a list of comments"""
 
     def __init__(
-        self, service: CommentService, type_name: TypeComment, user_id: int
+        self,
+        service: CommentService,
+        type_name: TypeComment,
+        user_id: int,
+        cursor: str | None,
+        limit: int,
     ) -> None:
         self.type_name = type_name
         self.user_id = user_id
+        self.cursor = cursor
+        self.limit = limit
         self.service = service
 
     async def operation(self) -> T:
         """Method of receiving comments"""
         return await self.service.get_comments(
-            IsTypeSpecification(self.type_name), self.user_id
+            IsTypeSpecification(self.type_name), self.user_id, self.cursor, self.limit
         )
 
 
 class OperationPostStrategy(BaseOperationStrategy):
     """A class that allows you to get a list of posts"""
 
-    def __init__(self, service: PostService, status_name: Status) -> None:
+    def __init__(
+        self,
+        service: PostService,
+        status_name: Status,
+        cursor: str | None,
+        limit: int,
+        fields: list[str] | None = None,
+        with_comments: int | None = None,
+    ) -> None:
         self.status_name = status_name
+        self.cursor = cursor
+        self.limit = limit
+        self.fields = fields
+        self.with_comments = with_comments
         self.service = service
 
     async def operation(self) -> T:
         """Method of receiving posts"""
-        return await self.service.get_posts(IsStatusSpecification(self.status_name))
+        return await self.service.get_posts(
+            IsStatusSpecification(self.status_name),
+            self.cursor,
+            self.limit,
+            self.fields,
+            self.with_comments,
+        )
 
 
 class RedisCache:
@@ -55,25 +80,22 @@ class RedisCache:
 
     def __init__(self, redis_cli: Redis, time: int) -> None:
         self.redis = redis_cli
-        self._strategy = None
         self.time = time
 
-    @property
-    def strategy(self) -> BaseOperationStrategy:
-        return self._strategy
-
-    @strategy.setter
-    def strategy(self, strategy: BaseOperationStrategy) -> None:
-        self._strategy = strategy
-
-    async def commands_cache(self, key: str, **kwargs) -> T:
-        """The method of caching various data"""
-        cache_bytes = await self.redis.get(key + "".join(kwargs))
+    async def commands_cache(
+        self, strategy: BaseOperationStrategy, key: str, **kwargs
+    ) -> T:
+        """
+        The method of caching various data, the strategy of a request is passed
+        in so that concurrent requests never share one
+        """
+        key = ":".join([key, *(f"{name}={value}" for name, value in kwargs.items())])
+        cache_bytes = await self.redis.get(key)
         if cache_bytes:
             cache = pickle.loads(cache_bytes)
             result = cache
         else:
-            result = await self.strategy.operation()
+            result = await strategy.operation()
             cache_bytes = pickle.dumps(result)
             await self.redis.set(key, cache_bytes, self.time)
         return result
@@ -1,9 +1,30 @@
+from typing import AsyncIterator, Sequence
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import (
+    Integer,
+    String,
+    and_,
+    any_,
+    bindparam,
+    cast,
+    delete,
+    exists,
+    func,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import aliased
+
 from models.comments import Comment
+from utils.common import CommentOrder
+from utils.pagination import keyset_before, decode_date_cursor, decode_int_cursor
 from utils.repository import SQLAlchemyBaseRepository, BaseCommentRepository
 from utils.specification import Specification
 
+PATH_WIDTH: int = 10
+
 
 class SQLAlchemyCommentRepository(
     SQLAlchemyBaseRepository[Comment], BaseCommentRepository
@@ -13,13 +34,257 @@ class SQLAlchemyCommentRepository(
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session, Comment)
 
+    async def add(self, data: dict) -> int:
+        """
+        Method of adding a comment, its materialized path is built from the path
+        of the parent right after the insert. Raises ValueError if the parent
+        belongs to another post
+        """
+        comment_id = await super().add(data)
+        parent = aliased(self._model)
+        parent_path = (
+            select(parent.path)
+            .where(
+                parent.id == self._model.parent_id,
+                parent.post_id == self._model.post_id,
+            )
+            .scalar_subquery()
+        )
+        own_path = func.lpad(cast(self._model.id, String), PATH_WIDTH, "0")
+        stmt = (
+            update(self._model)
+            .where(self._model.id == comment_id)  # type: ignore
+            .values(path=func.coalesce(parent_path + ".", "") + own_path)
+            .returning(self._model.path)
+        )
+        result = await self._session.execute(stmt)
+        if data.get("parent_id") is not None and "." not in result.scalar_one():
+            raise ValueError("Parent comment belongs to another post.")
+        return comment_id
+
+    async def set_approved(self, ids: list[int], approved: bool) -> list[int]:
+        """
+        Method of approving or rejecting many comments with one UPDATE, the IDs
+        are sent as a single array parameter. Returns the IDs of the comments
+        whose state was changed
+        """
+        stmt = (
+            update(self._model)
+            .where(
+                self._model.id  # type: ignore
+                == any_(bindparam("ids", sorted(set(ids)), type_=ARRAY(Integer))),
+                self._model.approved.is_distinct_from(approved),
+            )
+            .values(approved=approved)
+            .returning(self._model.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_subtree(
+        self, idd: int, per_parent: int | None = None
+    ) -> list[Comment]:
+        """
+        Getting an approved comment with its approved replies in thread order
+        with one query, the subtree is a single range scan of the path index.
+        When per_parent is given only the best rated replies of every comment
+        are kept. The replies of the cut and the rejected comments are returned
+        too and have to be pruned
+        """
+        root = aliased(self._model)
+        stmt = (
+            select(self._model)
+            .join(
+                root,
+                and_(
+                    self._model.path >= root.path,
+                    # "/" follows "." so the range ends right after the last reply
+                    self._model.path < root.path + "/",
+                ),
+            )
+            .where(
+                root.id == idd,  # type: ignore
+                root.approved.is_(True),
+                self._model.approved.is_(True),
+            )
+        )
+        if per_parent:
+            rank = func.row_number().over(
+                partition_by=self._model.parent_id,
+                order_by=(self._model.karma.desc(), self._model.id.desc()),
+            )
+            ranked = stmt.add_columns(rank.label("rank")).subquery()
+            comment = aliased(self._model, ranked)
+            stmt = (
+                select(comment)
+                .where(ranked.c.rank <= per_parent)
+                .order_by(comment.path)
+            )
+        else:
+            stmt = stmt.order_by(self._model.path)
+        result = await self._session.execute(stmt)
+        return list(result.scalars().all())
+
     async def get_comments(
-        self, specification: Specification, idd: int
+        self,
+        specification: Specification,
+        idd: int,
+        cursor: str | None = None,
+        limit: int | None = None,
     ) -> list[Comment]:
-        """Getting comments on the author's ID"""
-        stmt = select(self._model).where(
-            specification.is_satisfied(), self._model.author_id == idd  # type: ignore
+        """
+        Getting comments on the author's ID, newest first. When a limit is given
+        one extra row is fetched so that the caller knows whether there is
+        a next page
+        """
+        stmt = (
+            select(self._model)
+            .where(
+                specification.is_satisfied(), self._model.author_id == idd  # type: ignore
+            )
+            .order_by(self._model.date.desc(), self._model.id.desc())
         )
+        if cursor:
+            stmt = stmt.where(
+                keyset_before(
+                    (self._model.date, self._model.id), decode_date_cursor(cursor)
+                )
+            )
+        if limit:
+            stmt = stmt.limit(limit + 1)
         result = await self._session.execute(stmt)
         result = result.scalars().all()
         return list(result)
+
+    async def exists(self, idd: int) -> bool:
+        """Checking a comment by its primary key without locking the row"""
+        stmt = select(exists().where(self._model.id == idd))  # type: ignore
+        result = await self._session.execute(stmt)
+        return result.scalar_one()
+
+    async def get_karma(self, after_id: int, limit: int) -> Sequence[tuple[int, int]]:
+        """Method for getting the stored karma of a range of comments"""
+        stmt = (
+            select(self._model.id, self._model.karma)
+            .where(self._model.id > after_id)  # type: ignore
+            .order_by(self._model.id)
+            .limit(limit)
+        )
+        result = await self._session.execute(stmt)
+        return result.tuples().all()
+
+    async def get_reply_counts(
+        self, after_id: int, limit: int
+    ) -> Sequence[tuple[int, int, int]]:
+        """
+        Method for getting the stored and the actual number of replies
+        of a range of comments, used to repair drift of the denormalized counter.
+        The replies of the whole range are counted with one grouped scan
+        of the parent_id index
+        """
+        comments = (
+            select(self._model.id, self._model.comment_count)
+            .where(self._model.id > after_id)  # type: ignore
+            .order_by(self._model.id)
+            .limit(limit)
+            .cte("comments_range")
+        )
+        replies = (
+            select(self._model.parent_id, func.count().label("actual"))
+            .where(self._model.parent_id.in_(select(comments.c.id)))
+            .group_by(self._model.parent_id)
+            .subquery("replies")
+        )
+        stmt = (
+            select(
+                comments.c.id,
+                comments.c.comment_count,
+                func.coalesce(replies.c.actual, 0),
+            )
+            .outerjoin(replies, replies.c.parent_id == comments.c.id)
+            .order_by(comments.c.id)
+        )
+        result = await self._session.execute(stmt)
+        return [tuple(row) for row in result.all()]
+
+    async def get_post_comments(
+        self,
+        post_id: int,
+        order: CommentOrder,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> list[Comment]:
+        """
+        Getting the approved comments of a post, the newest or the best rated
+        first. Every page is a range scan of the partial (post_id, date, id) or
+        (post_id, karma, id) index of the approved comments, the condition is
+        written as the predicate of the indexes so that the planner matches it
+        """
+        if order == CommentOrder.KARMA:
+            keys, decode = (self._model.karma, self._model.id), decode_int_cursor
+        else:
+            keys, decode = (self._model.date, self._model.id), decode_date_cursor
+        stmt = (
+            select(self._model)
+            .where(
+                self._model.post_id == post_id,  # type: ignore
+                self._model.approved,
+            )
+            .order_by(*(key.desc() for key in keys))
+        )
+        if cursor:
+            stmt = stmt.where(keyset_before(keys, decode(cursor)))
+        if limit:
+            stmt = stmt.limit(limit + 1)
+        result = await self._session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def stream_comments(
+        self, specification: Specification, idd: int, batch_size: int
+    ) -> AsyncIterator[Comment]:
+        """
+        Method for iterating over all comments of the author through
+        a server-side cursor, only one batch of rows is held in memory at a time
+        """
+        stmt = (
+            select(self._model)
+            .where(
+                specification.is_satisfied(), self._model.author_id == idd  # type: ignore
+            )
+            .order_by(self._model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self._session.stream_scalars(stmt)
+        async for comment in result:
+            yield comment
+
+    async def delete(self, idd: int) -> tuple[int, int | None, list[int]] | None:
+        """
+        Method of removing a comment with its replies with one DELETE ... RETURNING,
+        the subtree is a range of the path index. Returns the IDs of the post and
+        of the parent of the removed comment and the IDs of all removed comments
+        """
+        root = aliased(self._model)
+        subtree = (
+            select(self._model.id)
+            .join(
+                root,
+                and_(
+                    self._model.path >= root.path,
+                    self._model.path < root.path + "/",
+                ),
+            )
+            .where(root.id == idd)  # type: ignore
+        )
+        stmt = (
+            delete(self._model)
+            .where(self._model.id.in_(subtree))  # type: ignore
+            .returning(self._model.id, self._model.post_id, self._model.parent_id)
+        )
+        result = await self._session.execute(stmt)
+        rows = result.tuples().all()
+        for comment_id, post_id, parent_id in rows:
+            if comment_id == idd:
+                return post_id, parent_id, [row[0] for row in rows]
+        return None
@@ -1,10 +1,12 @@
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from typing import AsyncIterator
 
-from sqlalchemy import select
+from sqlalchemy import Integer, String, any_, bindparam, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from log_config import add_logger
-from models.users import User
+from models.users import User, user_following
 from utils.repository import SQLAlchemyBaseRepository, BaseFollowerRepository
 
 
@@ -19,64 +21,271 @@ class SQLAlchemyFollowerRepository(
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session, User)
 
-    async def _helper_get_user(self, username: str) -> User:
-        """A method that finds a user in the database by username"""
-        stmt = (
-            select(self._model)
-            .options(selectinload(self._model.following))
+    def _target_id(self, username: str):
+        """The CTE that resolves a username to the ID of the user"""
+        return (
+            select(self._model.id)
             .where(self._model.username == username)  # type: ignore
+            .cte("target")
+        )
+
+    async def _change(self, target, changed) -> tuple[int | None, bool]:
+        """
+        The method of running a change of user_following as a data-modifying CTE,
+        returns the ID of the user behind the username, None if it is unknown,
+        and whether a row was changed
+        """
+        stmt = select(
+            select(target.c.id).scalar_subquery(),
+            select(func.count()).select_from(changed).scalar_subquery(),
         )
         result = await self._session.execute(stmt)
-        user = result.scalar_one()
-        return user
+        target_id, count = result.one()
+        if target_id is None:
+            logger.debug("Follower was not found in a database")
+        return target_id, count > 0
 
-    async def _helper_action_with_follower(
-        self, user: User, username: str, action: str
-    ) -> bool | None:
+    async def _result(self, target, changed) -> bool | None:
         """
-        A method that finds a user in the database by name and allows you
-        to delete or add a follower to the user
+        The method of running a change of user_following as a data-modifying CTE,
+        returns True if a row was changed, False if there was nothing
+        to change and None if the username is unknown
         """
-        stmt = select(self._model).where(self._model.username == username)  # type: ignore
+        target_id, changed = await self._change(target, changed)
+        return None if target_id is None else changed
+
+    async def add_follower(self, idd: int, added_username: str) -> bool | None:
+        """
+        The method of following a user with one INSERT ... ON CONFLICT DO NOTHING,
+        the username is resolved in the same statement
+        """
+        target = self._target_id(added_username)
+        inserted = (
+            insert(user_following)
+            .from_select(
+                ["user_id", "following_id"],
+                select(literal(idd, Integer), target.c.id),
+            )
+            .on_conflict_do_nothing()
+            .returning(user_following.c.following_id)
+            .cte("inserted")
+        )
+        return await self._result(target, inserted)
+
+    async def add_followers(self, idd: int, usernames: list[str]) -> dict[str, bool]:
+        """
+        The method of following many users with one statement, the usernames are
+        resolved with = ANY(...) and all edges are inserted with one
+        INSERT ... ON CONFLICT DO NOTHING. Returns whether each known username
+        was followed now, unknown usernames are left out
+        """
+        targets = (
+            select(self._model.id, self._model.username)
+            .where(
+                self._model.username  # type: ignore
+                == any_(bindparam("usernames", usernames, type_=ARRAY(String)))
+            )
+            .cte("targets")
+        )
+        inserted = (
+            insert(user_following)
+            .from_select(
+                ["user_id", "following_id"],
+                select(literal(idd, Integer), targets.c.id).order_by(targets.c.id),
+            )
+            .on_conflict_do_nothing()
+            .returning(user_following.c.following_id)
+            .cte("inserted")
+        )
+        stmt = select(
+            targets.c.username, inserted.c.following_id.is_not(None)
+        ).outerjoin(inserted, inserted.c.following_id == targets.c.id)
         result = await self._session.execute(stmt)
-        follower = result.scalars().first()
-        method = self._helper_action_with_follower.__name__
-        if follower:
-            logger.debug(
-                "Follower %s was found in a database of the %s function",
-                follower.id,
-                method,
+        return dict(result.tuples().all())
+
+    async def iter_follower_emails(
+        self, idd: int, chunk_size: int
+    ) -> AsyncIterator[list[str]]:
+        """
+        A method that yields the emails of the followers of a given user in chunks,
+        only the emails are selected and every chunk continues from the last ID
+        """
+        last_id = 0
+        while True:
+            stmt = (
+                select(self._model.id, self._model.email)
+                .join(user_following, user_following.c.user_id == self._model.id)
+                .where(
+                    user_following.c.following_id == idd,
+                    self._model.id > last_id,  # type: ignore
+                )
+                .order_by(self._model.id)
+                .limit(chunk_size)
             )
-            if action == "append":
-                user.following.append(follower)
-            else:
-                user.following.remove(follower)
-            return True
-        logger.debug("Follower was not found in a database of the %s function", method)
-
-    async def add_follower(self, username: str, added_username: str) -> bool | None:
-        """The main method of adding a follower"""
-        user = await self._helper_get_user(username)
-        return await self._helper_action_with_follower(user, added_username, "append")
-
-    async def get_followers(self, idd: int) -> list[User]:
-        """
-        A method that allows you to get a list of emails of all followers
-        of a given user by his ID
-        """
-        stmt = (
-            select(self._model)
-            .options(selectinload(self._model.following))
-            .where(User.id == idd)  # type: ignore
+            result = await self._session.execute(stmt)
+            rows = result.all()
+            if not rows:
+                return
+            yield [email for _, email in rows]
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
+    async def iter_follower_ids(
+        self, idd: int, chunk_size: int
+    ) -> AsyncIterator[list[int]]:
+        """
+        A method that yields the IDs of the followers of a given user in chunks,
+        each chunk is a bounded range of the reverse user_following index
+        """
+        last_id = 0
+        while True:
+            stmt = (
+                select(user_following.c.user_id)
+                .where(
+                    user_following.c.following_id == idd,
+                    user_following.c.user_id > last_id,
+                )
+                .order_by(user_following.c.user_id)
+                .limit(chunk_size)
+            )
+            result = await self._session.execute(stmt)
+            ids = list(result.scalars().all())
+            if not ids:
+                return
+            yield ids
+            if len(ids) < chunk_size:
+                return
+            last_id = ids[-1]
+
+    async def iter_follow_graph(self, chunk_size: int) -> AsyncIterator[dict]:
+        """
+        A method that walks over all users in chunks of IDs and yields their
+        usernames with the usernames of their followers and of the users
+        they follow, only usernames are selected
+        """
+        follower, followed = aliased(self._model), aliased(self._model)
+        edges = (
+            select(follower.username, followed.username)
+            .join(follower, follower.id == user_following.c.user_id)
+            .join(followed, followed.id == user_following.c.following_id)
         )
-        user = await self._session.execute(stmt)
-        user = user.scalar_one()
-        result = [user.email for user in user.following]
-        return result
+        last_id = 0
+        while True:
+            stmt = (
+                select(self._model.id, self._model.username)
+                .where(self._model.id > last_id)  # type: ignore
+                .order_by(self._model.id)
+                .limit(chunk_size)
+            )
+            users = (await self._session.execute(stmt)).all()
+            if not users:
+                return
+            ids = [idd for idd, _ in users]
+            followers, following = {}, {}
+            stmt = edges.where(user_following.c.following_id.in_(ids))
+            for name, followed_name in (await self._session.execute(stmt)).all():
+                followers.setdefault(followed_name, []).append(name)
+            stmt = edges.where(user_following.c.user_id.in_(ids))
+            for name, followed_name in (await self._session.execute(stmt)).all():
+                following.setdefault(name, []).append(followed_name)
+            yield {
+                "usernames": [username for _, username in users],
+                "followers": followers,
+                "following": following,
+            }
+            if len(users) < chunk_size:
+                return
+            last_id = ids[-1]
+
+    async def iter_suggestions(
+        self, chunk_size: int, limit: int
+    ) -> AsyncIterator[tuple[list[int], dict[int, dict[str, int]]]]:
+        """
+        A method that walks over all users in chunks of IDs and yields the best
+        friend-of-friend suggestions of every user of a chunk. The users followed
+        by the followed users are counted with one grouped join per chunk,
+        the candidates that are already followed are left out and the top
+        of every user is cut with a window function
+        """
+        first, second = aliased(user_following), aliased(user_following)
+        followed = aliased(user_following)
+        mutual = func.count().label("mutual")
+        last_id = 0
+        while True:
+            stmt = (
+                select(self._model.id)
+                .where(self._model.id > last_id)  # type: ignore
+                .order_by(self._model.id)
+                .limit(chunk_size)
+            )
+            ids = list((await self._session.execute(stmt)).scalars().all())
+            if not ids:
+                return
+            candidates = (
+                select(
+                    first.c.user_id,
+                    second.c.following_id,
+                    mutual,
+                    func.row_number()
+                    .over(
+                        partition_by=first.c.user_id,
+                        order_by=(mutual.desc(), second.c.following_id),
+                    )
+                    .label("rank"),
+                )
+                .join(second, second.c.user_id == first.c.following_id)
+                .where(
+                    first.c.user_id.in_(ids),
+                    second.c.following_id != first.c.user_id,
+                    ~select(followed.c.user_id)
+                    .where(
+                        followed.c.user_id == first.c.user_id,
+                        followed.c.following_id == second.c.following_id,
+                    )
+                    .exists(),
+                )
+                .group_by(first.c.user_id, second.c.following_id)
+                .subquery()
+            )
+            stmt = (
+                select(candidates.c.user_id, self._model.username, candidates.c.mutual)
+                .join(self._model, self._model.id == candidates.c.following_id)
+                .where(candidates.c.rank <= limit)
+            )
+            suggestions = {}
+            for user_id, username, count in (await self._session.execute(stmt)).all():
+                suggestions.setdefault(user_id, {})[username] = count
+            yield ids, suggestions
+            if len(ids) < chunk_size:
+                return
+            last_id = ids[-1]
+
+    async def get_followed_among(self, idd: int, ids: list[int]) -> list[int]:
+        """A method that returns which of the given users a given user follows"""
+        stmt = select(user_following.c.following_id).where(
+            user_following.c.user_id == idd,
+            user_following.c.following_id.in_(ids),
+        )
+        result = await self._session.execute(stmt)
+        return list(result.scalars().all())
 
     async def delete_follower(
-        self, username: str, removed_username: str
-    ) -> bool | None:
-        """The main method of removing a follower"""
-        user = await self._helper_get_user(username)
-        return await self._helper_action_with_follower(user, removed_username, "remove")
+        self, idd: int, removed_username: str
+    ) -> tuple[int | None, bool]:
+        """
+        The method of unfollowing a user with one DELETE, the username is
+        resolved in the same statement. Returns the ID of the unfollowed user,
+        None if the username is unknown, and whether the user was followed
+        """
+        target = self._target_id(removed_username)
+        deleted = (
+            delete(user_following)
+            .where(
+                user_following.c.user_id == idd,
+                user_following.c.following_id.in_(select(target.c.id)),
+            )
+            .returning(user_following.c.following_id)
+            .cte("deleted")
+        )
+        return await self._change(target, deleted)
@@ -1,12 +1,30 @@
-from typing import Sequence
+from datetime import timedelta
+from typing import AsyncIterator, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import (
+    Float,
+    Integer,
+    any_,
+    bindparam,
+    cast,
+    delete,
+    func,
+    literal_column,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
+from models.comments import Comment
+from models.images import Image
 from models.posts import Post
+from utils.common import Status
+from utils.pagination import keyset_before, decode_cursor, decode_date_cursor
 from utils.repository import SQLAlchemyBaseRepository, BasePostRepository
-from utils.specification import Specification
+from utils.specification import Specification, SearchSpecification
 
 
 class SQLAlchemyPostRepository(SQLAlchemyBaseRepository[Post], BasePostRepository):
@@ -15,14 +33,334 @@ class SQLAlchemyPostRepository(SQLAlchemyBaseRepository[Post], BasePostRepositor
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session, Post)
 
-    async def list(self, specification: Specification) -> Sequence[Post]:
-        """Method for getting a list of posts"""
+    async def update(self, idd: int, data: dict) -> Post | None:
+        """Method of updating a post, the time of the change is set as well"""
+        return await super().update(idd, {**data, "modified": func.now()})
+
+    async def list(
+        self,
+        specification: Specification,
+        cursor: str | None = None,
+        limit: int | None = None,
+        fields: Sequence[str] | None = None,
+        with_comments: int | None = None,
+    ) -> Sequence[dict]:
+        """
+        Method for getting a list of posts, newest first. When a limit is given
+        one extra row is fetched so that the caller knows whether there is
+        a next page. When fields are given only those columns are selected,
+        together with the id and date that the cursor needs. When with_comments
+        is given the best rated comments of every post are attached
+        """
+        if fields is None:
+            stmt = select(self._model).options(selectinload(self._model.images))
+        else:
+            columns = {"id", "date", *fields} - {"images"}
+            stmt = select(*(getattr(self._model, name) for name in columns))
+        stmt = stmt.where(specification.is_satisfied()).order_by(  # type: ignore
+            self._model.date.desc(), self._model.id.desc()
+        )
+        if cursor:
+            stmt = stmt.where(
+                keyset_before(
+                    (self._model.date, self._model.id), decode_date_cursor(cursor)
+                )
+            )
+        if limit:
+            stmt = stmt.limit(limit + 1)
+        result = await self._session.execute(stmt)
+        if fields is None:
+            posts = [post.to_dict() for post in result.scalars().all()]
+        else:
+            posts = [dict(row) for row in result.mappings().all()]
+            if "images" in fields:
+                await self._attach_images(posts)
+        if with_comments:
+            await self._attach_comments(posts, with_comments)
+        return posts
+
+    async def stream(
+        self, specification: Specification, batch_size: int
+    ) -> AsyncIterator[dict]:
+        """
+        Method for iterating over all matching posts through a server-side cursor,
+        only one batch of rows is held in memory at a time
+        """
         stmt = (
             select(self._model)
             .options(selectinload(self._model.images))
             .where(specification.is_satisfied())  # type: ignore
+            .order_by(self._model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self._session.stream_scalars(stmt)
+        async for post in result:
+            yield post.to_dict()
+
+    async def _attach_images(self, posts: Sequence[dict]) -> None:
+        """Method for loading the images of a list of posts in one query"""
+        for post in posts:
+            post["images"] = []
+        by_id = {post["id"]: post for post in posts}
+        if not by_id:
+            return
+        stmt = select(Image.post_id, Image.image).where(Image.post_id.in_(by_id))
+        result = await self._session.execute(stmt)
+        for post_id, image in result.all():
+            by_id[post_id]["images"].append({"image": image})
+
+    async def _attach_comments(self, posts: Sequence[dict], limit: int) -> None:
+        """
+        Method for loading the best rated approved comments of a list of posts
+        in one query, a LATERAL subquery takes the first rows of the partial
+        (post_id, karma, id) index of the approved comments of every post
+        """
+        for post in posts:
+            post["comments"] = []
+        by_id = {post["id"]: post for post in posts}
+        if not by_id:
+            return
+        top = (
+            select(Comment)
+            .where(
+                Comment.post_id == self._model.id,
+                Comment.approved,
+            )
+            .order_by(Comment.karma.desc(), Comment.id.desc())
+            .limit(limit)
+            .lateral("top_comments")
+        )
+        comment = aliased(Comment, top)
+        stmt = (
+            select(comment)
+            .select_from(self._model)
+            .join(top, true())
+            .where(
+                self._model.id  # type: ignore
+                == any_(bindparam("ids", list(by_id), type_=ARRAY(Integer)))
+            )
+            .order_by(comment.post_id, comment.karma.desc(), comment.id.desc())
+        )
+        result = await self._session.execute(stmt)
+        for row in result.scalars().all():
+            by_id[row.post_id]["comments"].append(row)
+
+    async def delete_post(self, idd: int) -> Sequence[int] | None:
+        """
+        Method for removing a post with its comments in one statement of
+        data-modifying CTEs, the images go with the post by the cascade.
+        Returns the IDs of the removed comments or None if there is no such post
+        """
+        deleted_comments = (
+            delete(Comment)
+            .where(Comment.post_id == idd)
+            .returning(Comment.id)
+            .cte("deleted_comments")
+        )
+        deleted_post = (
+            delete(self._model)
+            .where(self._model.id == idd)  # type: ignore
+            .returning(self._model.id)
+            .cte("deleted_post")
+        )
+        stmt = select(
+            select(deleted_post.c.id).scalar_subquery(),
+            select(func.array_agg(deleted_comments.c.id)).scalar_subquery(),
+        )
+        result = await self._session.execute(stmt)
+        post_id, comment_ids = result.one()
+        if post_id is None:
+            return None
+        return comment_ids or []
+
+    async def get_post(self, idd: int) -> dict | None:
+        """Method for getting a post by its ID"""
+        stmt = (
+            select(self._model)
+            .options(selectinload(self._model.images))
+            .where(self._model.id == idd)  # type: ignore
         )
         result = await self._session.execute(stmt)
-        posts = result.scalars().all()
-        result = [post.to_dict() for post in posts]
-        return result
+        post = result.scalars().first()
+        return post.to_dict() if post else None
+
+    async def get_many(self, ids: Sequence[int]) -> Sequence[dict]:
+        """
+        Method for getting published posts by a list of IDs in one query,
+        keeping the order of the IDs
+        """
+        stmt = (
+            select(self._model)
+            .options(selectinload(self._model.images))
+            .where(
+                self._model.id.in_(ids),  # type: ignore
+                self._model.status == Status.PUBLISHED,
+            )
+        )
+        result = await self._session.execute(stmt)
+        posts = {post.id: post.to_dict() for post in result.scalars().all()}
+        return [posts[idd] for idd in ids if idd in posts]
+
+    async def search(
+        self,
+        specification: SearchSpecification,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> Sequence[dict]:
+        """
+        Method for full-text search over published posts, the best matches first.
+        The matching rows are found through the GIN index on the search vector
+        """
+        rank = specification.rank()
+        stmt = (
+            select(self._model, rank.label("rank"))
+            .options(selectinload(self._model.images))
+            .where(
+                specification.is_satisfied(),
+                self._model.status == Status.PUBLISHED,
+            )
+            .order_by(rank.desc(), self._model.id.desc())
+        )
+        if cursor:
+            try:
+                keys = tuple(float(key) for key in decode_cursor(cursor))
+            except (TypeError, ValueError) as exc:
+                raise ValueError("Invalid cursor.") from exc
+            stmt = stmt.where(keyset_before((rank, self._model.id), keys))
+        if limit:
+            stmt = stmt.limit(limit + 1)
+        result = await self._session.execute(stmt)
+        return [post.to_dict() | {"rank": rank} for post, rank in result.all()]
+
+    async def get_comment_counts(
+        self, after_id: int, limit: int
+    ) -> Sequence[tuple[int, int, int]]:
+        """
+        Method for getting the stored and the actual number of comments
+        of a range of posts, used to repair drift of the denormalized counter
+        """
+        actual = (
+            select(func.count())
+            .where(Comment.post_id == self._model.id)
+            .correlate(self._model)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(self._model.id, self._model.comment_count, actual)
+            .where(self._model.id > after_id)  # type: ignore
+            .order_by(self._model.id)
+            .limit(limit)
+        )
+        result = await self._session.execute(stmt)
+        return [tuple(row) for row in result.all()]
+
+    async def publish_due(self, limit: int) -> Sequence[tuple[int, int]]:
+        """
+        Method for publishing a batch of scheduled posts whose time has come
+        with one UPDATE, the rows locked by other workers are skipped.
+        The status is compared with a literal so that the partial index is used
+        """
+        due = (
+            select(self._model.id)
+            .where(
+                self._model.status == literal_column("'FUTURE'"),
+                self._model.publish_at <= func.now(),
+            )
+            .order_by(self._model.publish_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte("due")
+        )
+        stmt = (
+            update(self._model)
+            .where(self._model.id == due.c.id)  # type: ignore
+            .values(status=Status.PUBLISHED, date=self._model.publish_at)
+            .returning(self._model.id, self._model.author_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return [tuple(row) for row in result.all()]
+
+    async def purge_trash(
+        self, retention: timedelta, limit: int
+    ) -> tuple[Sequence[int], int, Sequence[int]]:
+        """
+        Method for hard-deleting a batch of trashed posts older than the retention
+        window together with their images and comments in one statement of
+        data-modifying CTEs, returns the IDs of the deleted posts, the number
+        of the deleted images and the IDs of the deleted comments
+        """
+        doomed = (
+            select(self._model.id)
+            .where(
+                self._model.status == literal_column("'TRASH'"),
+                self._model.modified < func.now() - retention,
+            )
+            .order_by(self._model.modified)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte("doomed")
+        )
+        deleted_images = (
+            delete(Image)
+            .where(Image.post_id.in_(select(doomed.c.id)))
+            .returning(Image.id)
+            .cte("deleted_images")
+        )
+        deleted_comments = (
+            delete(Comment)
+            .where(Comment.post_id.in_(select(doomed.c.id)))
+            .returning(Comment.id)
+            .cte("deleted_comments")
+        )
+        deleted_posts = (
+            delete(self._model)
+            .where(self._model.id.in_(select(doomed.c.id)))  # type: ignore
+            .returning(self._model.id)
+            .cte("deleted_posts")
+        )
+        stmt = select(
+            select(func.array_agg(deleted_posts.c.id)).scalar_subquery(),
+            select(func.count()).select_from(deleted_images).scalar_subquery(),
+            select(func.array_agg(deleted_comments.c.id)).scalar_subquery(),
+        )
+        result = await self._session.execute(stmt)
+        post_ids, images, comment_ids = result.one()
+        return post_ids or [], images, comment_ids or []
+
+    async def get_recent_activity(
+        self, window: timedelta
+    ) -> Sequence[tuple[int, float, int]]:
+        """
+        Method for getting the posts published within the window as
+        (id, age in seconds, number of views) rows
+        """
+        age = cast(func.extract("epoch", func.now() - self._model.date), Float)
+        stmt = select(self._model.id, age, self._model.view_count).where(
+            self._model.status == Status.PUBLISHED,
+            self._model.date >= func.now() - window,
+        )
+        result = await self._session.execute(stmt)
+        return result.tuples().all()
+
+    async def iter_recent_comments(
+        self, window: timedelta, batch_size: int
+    ) -> AsyncIterator[Sequence[tuple[int, float, int]]]:
+        """
+        Method for iterating over the comments written within the window on the
+        posts published within it as chunks of (post id, age in seconds, karma) rows
+        """
+        age = cast(func.extract("epoch", func.now() - Comment.date), Float)
+        stmt = (
+            select(Comment.post_id, age, Comment.karma)
+            .join(self._model, self._model.id == Comment.post_id)
+            .where(
+                self._model.status == Status.PUBLISHED,
+                self._model.date >= func.now() - window,
+                Comment.date >= func.now() - window,
+            )
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self._session.stream(stmt)
+        async for chunk in result.tuples().partitions():
+            yield chunk
@@ -3,8 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from models.users import User
 from sqlalchemy import insert
 from utils.repository import SQLAlchemyBaseRepository, BaseUserRepository
-from sqlalchemy import select
-from auth.utils import hash_password
+from sqlalchemy import select, RowMapping
 
 
 class SQLAlchemyUserRepository(SQLAlchemyBaseRepository[User], BaseUserRepository):
@@ -14,12 +13,12 @@ class SQLAlchemyUserRepository(SQLAlchemyBaseRepository[User], BaseUserRepositor
         super().__init__(session, User)
 
     async def add(self, data: dict) -> int:
-        """The method of adding a user"""
+        """The method of adding a user with an already hashed password"""
         stmt = (
             insert(self._model)
             .values(
                 username=data["username"],
-                password=hash_password(data["password"]),
+                password=data["password"],
                 email=data["email"],
             )
             .returning(self._model.id)
@@ -33,3 +32,11 @@ class SQLAlchemyUserRepository(SQLAlchemyBaseRepository[User], BaseUserRepositor
         result = await self._session.execute(stmt)
         result = result.scalars().first()
         return result
+
+    async def get_principal(self, name: str) -> RowMapping | None:
+        """The method of getting only the columns that identify a user"""
+        stmt = select(self._model.id, self._model.username, self._model.email).where(
+            self._model.username == name  # type: ignore
+        )
+        result = await self._session.execute(stmt)
+        return result.mappings().first()
@@ -1,6 +1,7 @@
-from typing import Annotated, Sequence
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.exc import IntegrityError
 
 from starlette import status
@@ -9,35 +10,118 @@ from auth.auth import validate_access_token
 
 from dependencies import comment_service
 from log_config import add_logger
-from models.users import User
 from redis_client import OperationCommentStrategy
 from routers.posts import REDIS_CACHE
 from schemas.comments import (
+    CommentPageSchema,
     CommentSchema,
     CommentCreateSchema,
     CommentUpdateSchema,
+    CommentVoteSchema,
     CommentIDSchema,
+    CommentModerationSchema,
+    IDCommentsSchema,
     ResultCommentSchema,
 )
+from schemas.users import PrincipalSchema
 from services.comments import CommentService
 
 from utils.common import TypeComment
+from utils.etag import (
+    COMMENTS_VERSION,
+    cache_headers,
+    is_not_modified,
+    make_etag,
+    not_modified,
+)
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.specification import IsTypeSpecification
 
 router = APIRouter(prefix="/comments", tags=["comments"])
 
 logger = add_logger(__name__)
 
 
-@router.get("/", status_code=status.HTTP_200_OK, response_model=list[CommentSchema])
+@router.get("/", status_code=status.HTTP_200_OK, response_model=CommentPageSchema)
 async def get_comments(
+    request: Request,
+    response: Response,
     comments_service: Annotated[CommentService, Depends(comment_service)],
-    user: Annotated[User, Depends(validate_access_token)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
     type_name: TypeComment = None,
-) -> Sequence[CommentSchema]:
-    REDIS_CACHE.strategy = OperationCommentStrategy(
-        comments_service, type_name, user.id
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> CommentPageSchema:
+    version, modified = await COMMENTS_VERSION.get()
+    etag = make_etag("comments", version, user.id, type_name, cursor, limit)
+    if is_not_modified(request, etag, modified):
+        return not_modified(etag, modified)
+    strategy = OperationCommentStrategy(
+        comments_service, type_name, user.id, cursor, limit
     )
-    comments = await REDIS_CACHE.commands_cache("comments", type=type_name)
+    try:
+        comments = await REDIS_CACHE.commands_cache(
+            strategy,
+            "comments",
+            version=version,
+            user=user.id,
+            type=type_name,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as exc:
+        logger.debug("Invalid cursor trying get comments was gotten failure %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+    response.headers.update(cache_headers(etag, modified))
+    return comments
+
+
+@router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+)
+async def export_comments(
+    comments_service: Annotated[CommentService, Depends(comment_service)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    type_name: TypeComment = None,
+) -> StreamingResponse:
+    lines = await comments_service.export_comments(
+        IsTypeSpecification(type_name), user.id
+    )
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.get(
+    "/{idd}/replies",
+    status_code=status.HTTP_200_OK,
+    response_model=list[CommentSchema],
+)
+async def get_replies(
+    idd: int,
+    request: Request,
+    response: Response,
+    comments_service: Annotated[CommentService, Depends(comment_service)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    per_parent: int = Query(
+        None, ge=1, description="Number of the best rated replies of every comment"
+    ),
+) -> list[CommentSchema]:
+    version, modified = await COMMENTS_VERSION.get()
+    etag = make_etag("replies", idd, version, per_parent)
+    if is_not_modified(request, etag, modified):
+        return not_modified(etag, modified)
+    comments = await comments_service.get_replies(idd, per_parent)
+    if not comments:
+        logger.debug("Comment does not exist trying get replies")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Comment does not exist.",
+        )
+    response.headers.update(cache_headers(etag, modified))
     return comments
 
 
@@ -48,7 +132,7 @@ async def get_comments(
 )
 async def create_comment(
     comments_service: Annotated[CommentService, Depends(comment_service)],
-    user: Annotated[User, Depends(validate_access_token)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
     data: CommentCreateSchema,
 ) -> CommentIDSchema:
     try:
@@ -62,9 +146,53 @@ async def create_comment(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Author or post does not exist.",
         )
+    except ValueError as exc:
+        logger.debug(
+            "Parent of another post trying create comment was gotten failure %s",
+            exc,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parent comment does not belong to the post.",
+        )
     return CommentIDSchema(comment_id=comment_id)
 
 
+@router.put(
+    "/{idd}/vote",
+    status_code=status.HTTP_200_OK,
+    response_model=ResultCommentSchema,
+)
+async def vote_comment(
+    idd: int,
+    data: CommentVoteSchema,
+    comments_service: Annotated[CommentService, Depends(comment_service)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+) -> ResultCommentSchema:
+    delta = await comments_service.vote_comment(idd, user.id, data.vote)
+    if delta is None:
+        logger.debug("Comment does not exist trying vote for comment")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Comment does not exist.",
+        )
+    return ResultCommentSchema(result=delta != 0)
+
+
+@router.patch(
+    "/moderation",
+    status_code=status.HTTP_200_OK,
+    response_model=IDCommentsSchema,
+)
+async def moderate_comments(
+    data: CommentModerationSchema,
+    comments_service: Annotated[CommentService, Depends(comment_service)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+) -> IDCommentsSchema:
+    comment_ids = await comments_service.moderate_comments(data.ids, data.approved)
+    return IDCommentsSchema(comment_ids=comment_ids)
+
+
 @router.patch(
     "/{idd}",
     status_code=status.HTTP_200_OK,
@@ -73,7 +201,7 @@ async def change_comment(
     idd: int,
     data: CommentUpdateSchema,
     comments_service: Annotated[CommentService, Depends(comment_service)],
-    user: Annotated[User, Depends(validate_access_token)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
 ) -> dict:
     try:
         comment = await comments_service.change_comment(idd, data)
@@ -103,7 +231,7 @@ async def change_comment(
 async def delete_comment(
     idd: int,
     comments_service: Annotated[CommentService, Depends(comment_service)],
-    user: Annotated[User, Depends(validate_access_token)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
 ) -> ResultCommentSchema:
     comment = await comments_service.delete_comment(idd)
     if comment is None:
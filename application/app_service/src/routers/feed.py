@@ -0,0 +1,39 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from starlette import status
+
+from auth.auth import validate_access_token
+from dependencies import feed_service
+from log_config import add_logger
+from schemas.posts import PostPageSchema
+from schemas.users import PrincipalSchema
+from services.feed import FeedService
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+router = APIRouter(prefix="/feed", tags=["feed"])
+
+logger = add_logger(__name__)
+
+
+@router.get(
+    "/",
+    status_code=status.HTTP_200_OK,
+    response_model=PostPageSchema,
+)
+async def get_feed(
+    feeds_service: Annotated[FeedService, Depends(feed_service)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> PostPageSchema:
+    try:
+        feed = await feeds_service.get_feed(user.id, cursor, limit)
+    except ValueError as exc:
+        logger.debug("Invalid cursor trying get feed was gotten failure %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+    return feed
@@ -1,15 +1,19 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.exc import IntegrityError
 
 from starlette import status
 
 from auth.auth import validate_access_token
-from dependencies import follower_service
+from dependencies import feed_service, follower_service
 from log_config import add_logger
-from models.users import User
-from schemas.users import ResultFollowerSchema
+from schemas.users import (
+    PrincipalSchema,
+    FollowersBulkSchema,
+    ResultFollowerSchema,
+    ResultFollowersBulkSchema,
+)
+from services.feed import FeedService
 from services.followers import FollowerService
 
 router = APIRouter(prefix="/followers", tags=["followers"])
@@ -17,6 +21,22 @@ router = APIRouter(prefix="/followers", tags=["followers"])
 logger = add_logger(__name__)
 
 
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ResultFollowersBulkSchema,
+)
+async def create_followers(
+    data: FollowersBulkSchema,
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    followers_service: Annotated[FollowerService, Depends(follower_service)],
+) -> ResultFollowersBulkSchema:
+    result = await followers_service.add_followers(
+        user.id, user.username, data.usernames
+    )
+    return ResultFollowersBulkSchema(**result)
+
+
 @router.post(
     "/{name}",
     status_code=status.HTTP_201_CREATED,
@@ -24,26 +44,22 @@ logger = add_logger(__name__)
 )
 async def create_follower(
     name: str,
-    user: Annotated[User, Depends(validate_access_token)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
     followers_service: Annotated[FollowerService, Depends(follower_service)],
 ) -> ResultFollowerSchema:
-    try:
-        follower = await followers_service.add_follower(user.username, name)
-    except IntegrityError as exc:
-        logger.debug(
-            "This user is already on the list of followers trying create follower was gotten failure %s",
-            exc,
-        )
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="This user is already on the list of followers.",
-        )
+    follower = await followers_service.add_follower(user.id, user.username, name)
     if follower is None:
         logger.debug("Follower does not exist trying create follower")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Follower does not exist.",
         )
+    if not follower:
+        logger.debug("This user is already on the list of followers")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This user is already on the list of followers.",
+        )
     return ResultFollowerSchema(result=True)
 
 
@@ -54,25 +70,23 @@ async def create_follower(
 )
 async def remove_follower(
     name: str,
-    user: Annotated[User, Depends(validate_access_token)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
     followers_service: Annotated[FollowerService, Depends(follower_service)],
+    feeds_service: Annotated[FeedService, Depends(feed_service)],
 ) -> ResultFollowerSchema:
-    try:
-        follower = await followers_service.delete_follower(user.username, name)
-    except ValueError as exc:
-        logger.debug(
-            "This user is not on the list of followers"
-            " trying create follower was gotten failure %s",
-            exc,
-        )
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="This user is not on the list of followers.",
-        )
+    follower = await followers_service.delete_follower(
+        user.id, user.username, name, feeds_service
+    )
     if follower is None:
         logger.debug("Follower does not exist trying remove follower")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Follower does not exist.",
         )
+    if not follower:
+        logger.debug("This user is not on the list of followers")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This user is not on the list of followers.",
+        )
     return ResultFollowerSchema(result=True)
@@ -1,55 +1,258 @@
 from typing import Annotated
 
-import aioredis
-from fastapi import APIRouter, Depends, HTTPException, File, Body, UploadFile
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    File,
+    Body,
+    UploadFile,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.exc import IntegrityError
 
 from starlette import status
 
 from auth.auth import validate_access_token
 from communication.media import CommunicateClient
+from db.redis_config import redis
 
-from dependencies import post_service, follower_service, image_service
-from env_config import settings
+from dependencies import (
+    comment_service,
+    post_service,
+    follower_service,
+    image_service,
+    feed_service,
+)
 from log_config import add_logger
-from models.users import User
 from redis_client import RedisCache, OperationPostStrategy
+from schemas.comments import CommentPageSchema
 from schemas.images import ImageSchema
 from schemas.posts import (
+    PostBulkCreateSchema,
     PostCreateSchema,
+    PostPageSchema,
+    PostPartialPageSchema,
     PostSchema,
     PostUpdateSchema,
     IDPostSchema,
+    IDPostsSchema,
     ResultPostSchema,
 )
+from schemas.users import PrincipalSchema
+from services.comments import CommentService
+from services.feed import FeedService
 from services.followers import FollowerService
 from services.images import ImageService
 from services.posts import PostService
-from utils.common import Status
+from utils.common import CommentOrder, Status
+from utils.etag import (
+    COMMENTS_VERSION,
+    POSTS_VERSION,
+    cache_headers,
+    is_not_modified,
+    make_etag,
+    not_modified,
+)
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_EMBEDDED_COMMENTS, MAX_PAGE_SIZE
+from utils.specification import SearchSpecification, IsStatusSpecification
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
-REDIS = aioredis.from_url(f"redis://{settings.redis.redis_host}")
-REDIS_CACHE = RedisCache(REDIS, 30)
+REDIS_CACHE = RedisCache(redis, 30)
 
 logger = add_logger(__name__)
 
 
+def _parse_fields(fields: str | None) -> list[str] | None:
+    """Validation of the fields requested by the client"""
+    if fields is None:
+        return None
+    fields_list = sorted({name.strip() for name in fields.split(",") if name.strip()})
+    unknown = set(fields_list) - set(PostSchema.model_fields)
+    if unknown:
+        logger.debug("Unknown fields %s trying get posts", unknown)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}.",
+        )
+    return fields_list
+
+
 @router.get(
     "/",
     status_code=status.HTTP_200_OK,
-    response_model=list[PostSchema],
+    response_model=PostPartialPageSchema,
+    response_model_exclude_unset=True,
 )
 async def get_posts(
+    request: Request,
+    response: Response,
     posts_service: Annotated[PostService, Depends(post_service)],
-    user: Annotated[User, Depends(validate_access_token)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
     status_name: Status = None,
-) -> list[PostSchema]:
-    REDIS_CACHE.strategy = OperationPostStrategy(posts_service, status_name)
-    posts = await REDIS_CACHE.commands_cache("posts", status=status_name)
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: str = Query(
+        None, description="Comma separated list of fields to return, e.g. name,excerpt"
+    ),
+    with_comments: int = Query(
+        None,
+        ge=1,
+        le=MAX_EMBEDDED_COMMENTS,
+        description="Number of the best rated comments to embed in every post",
+    ),
+) -> PostPartialPageSchema:
+    fields_list = _parse_fields(fields)
+    version, modified = await POSTS_VERSION.get()
+    if with_comments:
+        # The embedded comments make the page depend on the comments as well
+        comments_version, comments_modified = await COMMENTS_VERSION.get()
+        version = f"{version}.{comments_version}"
+        modified = max(modified, comments_modified)
+    etag = make_etag(
+        "posts", version, status_name, cursor, limit, fields_list, with_comments
+    )
+    if is_not_modified(request, etag, modified):
+        return not_modified(etag, modified)
+    strategy = OperationPostStrategy(
+        posts_service, status_name, cursor, limit, fields_list, with_comments
+    )
+    try:
+        posts = await REDIS_CACHE.commands_cache(
+            strategy,
+            "posts",
+            version=version,
+            status=status_name,
+            cursor=cursor,
+            limit=limit,
+            fields=fields_list,
+            with_comments=with_comments,
+        )
+    except ValueError as exc:
+        logger.debug("Invalid cursor trying get posts was gotten failure %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+    response.headers.update(cache_headers(etag, modified))
+    return posts
+
+
+@router.get(
+    "/search",
+    status_code=status.HTTP_200_OK,
+    response_model=PostPageSchema,
+)
+async def search_posts(
+    posts_service: Annotated[PostService, Depends(post_service)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    q: str = Query(min_length=1, max_length=256),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> PostPageSchema:
+    try:
+        posts = await posts_service.search_posts(SearchSpecification(q), cursor, limit)
+    except ValueError as exc:
+        logger.debug("Invalid cursor trying search posts was gotten failure %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
     return posts
 
 
+@router.get(
+    "/trending",
+    status_code=status.HTTP_200_OK,
+    response_model=list[PostSchema],
+)
+async def get_trending_posts(
+    posts_service: Annotated[PostService, Depends(post_service)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> list[PostSchema]:
+    return await posts_service.get_trending_posts(limit)
+
+
+@router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+)
+async def export_posts(
+    posts_service: Annotated[PostService, Depends(post_service)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    status_name: Status = None,
+) -> StreamingResponse:
+    lines = await posts_service.export_posts(IsStatusSpecification(status_name))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.get(
+    "/{idd}",
+    status_code=status.HTTP_200_OK,
+    response_model=PostSchema,
+)
+async def get_post(
+    idd: int,
+    request: Request,
+    response: Response,
+    posts_service: Annotated[PostService, Depends(post_service)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+) -> PostSchema:
+    version, modified = await POSTS_VERSION.get()
+    post = await posts_service.get_post(idd, user.id)
+    if post is None:
+        logger.debug("Post does not exist trying get post")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Post does not exist.",
+        )
+    # The number of views is a part of the post, so it is a part of the ETag
+    etag = make_etag("post", idd, version, post["view_count"])
+    if is_not_modified(request, etag, modified):
+        return not_modified(etag, modified)
+    response.headers.update(cache_headers(etag, modified))
+    return post
+
+
+@router.get(
+    "/{idd}/comments",
+    status_code=status.HTTP_200_OK,
+    response_model=CommentPageSchema,
+)
+async def get_post_comments(
+    idd: int,
+    request: Request,
+    response: Response,
+    comments_service: Annotated[CommentService, Depends(comment_service)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    order: CommentOrder = CommentOrder.DATE,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> CommentPageSchema:
+    version, modified = await COMMENTS_VERSION.get()
+    etag = make_etag("post_comments", idd, version, order, cursor, limit)
+    if is_not_modified(request, etag, modified):
+        return not_modified(etag, modified)
+    try:
+        comments = await comments_service.get_post_comments(idd, order, cursor, limit)
+    except ValueError as exc:
+        logger.debug(
+            "Invalid cursor trying get post comments was gotten failure %s", exc
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+    response.headers.update(cache_headers(etag, modified))
+    return comments
+
+
 @router.post(
     "/",
     status_code=status.HTTP_201_CREATED,
@@ -57,8 +260,9 @@ async def get_posts(
 )
 async def create_post(
     posts_service: Annotated[PostService, Depends(post_service)],
-    user: Annotated[User, Depends(validate_access_token)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
     followers_service: Annotated[FollowerService, Depends(follower_service)],
+    feeds_service: Annotated[FeedService, Depends(feed_service)],
     images_service: Annotated[ImageService, Depends(image_service)],
     data: PostCreateSchema = Body(...),
     file: Annotated[
@@ -70,6 +274,7 @@ async def create_post(
             data,
             user.id,
             followers_service,
+            feeds_service,
         )
         link_image = await CommunicateClient().send_image(file, post_id)
         if link_image:
@@ -87,6 +292,36 @@ async def create_post(
     return IDPostSchema(post_id=post_id)
 
 
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=IDPostsSchema,
+)
+async def create_posts(
+    data: PostBulkCreateSchema,
+    posts_service: Annotated[PostService, Depends(post_service)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    followers_service: Annotated[FollowerService, Depends(follower_service)],
+    feeds_service: Annotated[FeedService, Depends(feed_service)],
+) -> IDPostsSchema:
+    try:
+        post_ids = await posts_service.create_posts_and_send_emails(
+            data.posts,
+            followers_service,
+            feeds_service,
+        )
+    except IntegrityError as exc:
+        logger.debug(
+            "Author does not exist trying create posts was gotten failure %s",
+            exc,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Author does not exist.",
+        )
+    return IDPostsSchema(post_ids=post_ids)
+
+
 @router.patch(
     "/{idd}",
     status_code=status.HTTP_200_OK,
@@ -95,7 +330,7 @@ async def change_post(
     idd: int,
     data: PostUpdateSchema,
     posts_service: Annotated[PostService, Depends(post_service)],
-    user: Annotated[User, Depends(validate_access_token)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
 ) -> dict:
     try:
         post = await posts_service.change_post(idd, data)
@@ -125,7 +360,7 @@ async def change_post(
 async def delete_post(
     idd: int,
     posts_service: Annotated[PostService, Depends(post_service)],
-    user: Annotated[User, Depends(validate_access_token)],
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
 ) -> ResultPostSchema:
     post = await posts_service.delete_post(idd)
     if post is None:
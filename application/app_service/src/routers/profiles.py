@@ -0,0 +1,87 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from starlette import status
+
+from auth.auth import validate_access_token
+from dependencies import follower_service
+from log_config import add_logger
+from schemas.users import SuggestionSchema, UsernamePageSchema, PrincipalSchema
+from services.followers import FollowerService
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+logger = add_logger(__name__)
+
+
+@router.get(
+    "/me/suggestions",
+    status_code=status.HTTP_200_OK,
+    response_model=list[SuggestionSchema],
+)
+async def get_suggestions(
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    followers_service: Annotated[FollowerService, Depends(follower_service)],
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> list[SuggestionSchema]:
+    return await followers_service.get_suggestions(user.id, limit)
+
+
+@router.get(
+    "/{name}/followers",
+    status_code=status.HTTP_200_OK,
+    response_model=UsernamePageSchema,
+)
+async def get_followers(
+    name: str,
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    followers_service: Annotated[FollowerService, Depends(follower_service)],
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> UsernamePageSchema:
+    try:
+        followers = await followers_service.get_followers_page(name, cursor, limit)
+    except ValueError as exc:
+        logger.debug("Invalid cursor trying get followers was gotten failure %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+    if followers is None:
+        logger.debug("User does not exist trying get followers")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User does not exist.",
+        )
+    return followers
+
+
+@router.get(
+    "/{name}/following",
+    status_code=status.HTTP_200_OK,
+    response_model=UsernamePageSchema,
+)
+async def get_following(
+    name: str,
+    user: Annotated[PrincipalSchema, Depends(validate_access_token)],
+    followers_service: Annotated[FollowerService, Depends(follower_service)],
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> UsernamePageSchema:
+    try:
+        following = await followers_service.get_following_page(name, cursor, limit)
+    except ValueError as exc:
+        logger.debug("Invalid cursor trying get following was gotten failure %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+    if following is None:
+        logger.debug("User does not exist trying get following")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User does not exist.",
+        )
+    return following
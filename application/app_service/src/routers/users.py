@@ -1,15 +1,15 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, requests
+from fastapi import APIRouter, Depends, HTTPException, requests
 
 from starlette import status
 
 from auth.auth import validate_auth_user, validate_refresh_token
 from auth.helpers import create_access_token, create_refresh_token
+from auth.pool import PoolOverloadedError
 from dependencies import user_service
-from models.users import User
 from schemas.tokens import TokenSchema
-from schemas.users import UserCreateSchema, IDUserSchema
+from schemas.users import UserCreateSchema, IDUserSchema, PrincipalSchema
 from services.users import UserService
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -24,7 +24,14 @@ async def register_user(
     data: UserCreateSchema,
     users_service: Annotated[UserService, Depends(user_service)],
 ) -> IDUserSchema:
-    user_id = await users_service.create_user(data)
+    try:
+        user_id = await users_service.create_user(data)
+    except PoolOverloadedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many registration requests, try again later.",
+            headers={"Retry-After": "1"},
+        )
     return IDUserSchema(user_id=user_id)
 
 
@@ -51,7 +58,7 @@ async def login_user(
     response_model_exclude_none=True,
 )
 async def get_refresh_token(
-    user: Annotated[User, Depends(validate_refresh_token)]
+    user: Annotated[PrincipalSchema, Depends(validate_refresh_token)]
 ) -> TokenSchema:
     access_token = create_access_token(user)
     return TokenSchema(access_token=access_token)
@@ -1,6 +1,8 @@
 from datetime import datetime
 
-from pydantic import BaseModel, ConfigDict
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
 
 from utils.common import TypeComment
 
@@ -14,27 +16,46 @@ class CommentSchema(BaseModel):
     content: str
     approved: bool
     type: TypeComment
+    comment_count: int
     author_id: int
     post_id: int
+    parent_id: int | None = None
+
+
+class CommentPageSchema(BaseModel):
+    items: list[CommentSchema]
+    next_cursor: str | None = None
 
 
 class CommentCreateSchema(BaseModel):
-    karma: int
     content: str
     type: TypeComment = None
     author_id: int
     post_id: int
+    parent_id: int | None = None
 
 
 class CommentUpdateSchema(BaseModel):
-    karma: int = None
     content: str = None
     type: TypeComment = None
 
 
+class CommentModerationSchema(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=10000)
+    approved: bool
+
+
+class CommentVoteSchema(BaseModel):
+    vote: Literal[-1, 0, 1]
+
+
 class CommentIDSchema(BaseModel):
     comment_id: int
 
 
+class IDCommentsSchema(BaseModel):
+    comment_ids: list[int]
+
+
 class ResultCommentSchema(BaseModel):
     result: bool
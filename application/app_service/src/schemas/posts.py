@@ -1,8 +1,9 @@
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 
-from pydantic import BaseModel, model_validator, ConfigDict
+from pydantic import BaseModel, model_validator, ConfigDict, Field, field_validator
 
+from schemas.comments import CommentSchema
 from schemas.images import ViewImageSchema
 from utils.common import Status, StatusComment, TypePost
 
@@ -20,14 +21,51 @@ class PostSchema(BaseModel):
     status_comment: StatusComment
     type: TypePost
     comment_count: int
+    view_count: int
     images: list[ViewImageSchema]
 
 
+class PostPageSchema(BaseModel):
+    items: list[PostSchema]
+    next_cursor: str | None = None
+
+
+class PostPartialSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    date: datetime = None
+    modified: datetime = None
+    name: str = None
+    content: str = None
+    excerpt: str = None
+    status: Status = None
+    status_comment: StatusComment = None
+    type: TypePost = None
+    comment_count: int = None
+    view_count: int = None
+    images: list[ViewImageSchema] = None
+    comments: list[CommentSchema] = None
+
+
+class PostPartialPageSchema(BaseModel):
+    items: list[PostPartialSchema]
+    next_cursor: str | None = None
+
+
 class PostCreateSchema(BaseModel):
     name: str
     content: str
     excerpt: str
     author_id: int
+    publish_at: datetime | None = None
+
+    @field_validator("publish_at")
+    @classmethod
+    def validate_to_utc(cls, value):
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
 
     @model_validator(mode="before")
     @classmethod
@@ -37,6 +75,10 @@ class PostCreateSchema(BaseModel):
         return value
 
 
+class PostBulkCreateSchema(BaseModel):
+    posts: list[PostCreateSchema] = Field(min_length=1, max_length=1000)
+
+
 class PostUpdateSchema(BaseModel):
     name: str = None
     content: str = None
@@ -50,5 +92,9 @@ class IDPostSchema(BaseModel):
     post_id: int
 
 
+class IDPostsSchema(BaseModel):
+    post_ids: list[int]
+
+
 class ResultPostSchema(BaseModel):
     result: bool
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 
 
 class UserSchema(BaseModel):
@@ -10,6 +10,14 @@ class UserSchema(BaseModel):
     email: EmailStr
 
 
+class PrincipalSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    email: str
+
+
 class UserCreateSchema(BaseModel):
     username: str = "likeable"
     password: str = "qwerty"
@@ -20,5 +28,26 @@ class ResultFollowerSchema(BaseModel):
     result: bool
 
 
+class FollowersBulkSchema(BaseModel):
+    usernames: list[str] = Field(min_length=1, max_length=1000)
+
+
+class ResultFollowersBulkSchema(BaseModel):
+    followed: list[str]
+    already_followed: list[str]
+    unknown: list[str]
+
+
+class UsernamePageSchema(BaseModel):
+    items: list[str]
+    next_cursor: str | None = None
+    count: int
+
+
+class SuggestionSchema(BaseModel):
+    username: str
+    mutual: int
+
+
 class IDUserSchema(BaseModel):
     user_id: int
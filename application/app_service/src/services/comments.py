@@ -1,15 +1,58 @@
-from typing import Sequence, AsyncGenerator
+from typing import AsyncGenerator, AsyncIterator
 
+from db.db_config import async_session
+from env_config import settings
 from log_config import logged, add_logger
 from models.comments import Comment
-from schemas.comments import CommentCreateSchema
+from schemas.comments import CommentCreateSchema, CommentSchema
 from unit_of_work.utils import CommentUnitOfWork
+from utils.common import CommentOrder
+from utils.counters import (
+    COMMENT_KARMA_COUNTER,
+    COMMENT_REPLIES_COUNTER,
+    POST_COMMENTS_COUNTER,
+)
+from utils.etag import COMMENTS_VERSION
+from utils.pagination import DEFAULT_PAGE_SIZE, encode_cursor, make_page
 from utils.specification import Specification
+from utils.votes import COMMENT_VOTES
 
 
 logger = add_logger(__name__)
 
 
+async def _export_comments(
+    specification: Specification, idd: int
+) -> AsyncIterator[str]:
+    """
+    A function that yields the comments as NDJSON lines. It opens its own session
+    because the request session is closed before a streamed body is sent
+    """
+    async with async_session() as session:
+        async with CommentUnitOfWork(session_factory=session) as uow:
+            async for comment in uow.comments.stream_comments(
+                specification, idd, settings.worker.batch_size
+            ):
+                yield CommentSchema.model_validate(comment).model_dump_json() + "\n"
+
+
+def _prune_thread(comments: list[Comment]) -> list[Comment]:
+    """
+    A function that drops the replies whose parent was cut from a thread or
+    rejected, the comments come in thread order so a parent always precedes
+    its replies
+    """
+    if not comments:
+        return comments
+    kept = {comments[0].id}
+    thread = [comments[0]]
+    for comment in comments[1:]:
+        if comment.parent_id in kept:
+            kept.add(comment.id)
+            thread.append(comment)
+    return thread
+
+
 @logged(logger)
 class CommentService:
     """A class that allows you to work with comments"""
@@ -23,15 +66,64 @@ class CommentService:
         async with CommentUnitOfWork(session_factory=self.session) as uow:
             comment_id = await uow.comments.add(comment_dict)
             await uow.commit()
-            return comment_id
+        await POST_COMMENTS_COUNTER.incr(comment_dict["post_id"])
+        if comment_dict["parent_id"] is not None:
+            await COMMENT_REPLIES_COUNTER.incr(comment_dict["parent_id"])
+        await COMMENTS_VERSION.bump()
+        return comment_id
 
     async def get_comments(
-        self, specification: Specification, idd: int
-    ) -> Sequence[Comment]:
-        """Method of receiving comments"""
+        self,
+        specification: Specification,
+        idd: int,
+        cursor: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> dict:
+        """Method of receiving a page of comments"""
         async with CommentUnitOfWork(session_factory=self.session) as uow:
-            comments = await uow.comments.get_comments(specification, idd)
-            return comments
+            comments = await uow.comments.get_comments(
+                specification, idd, cursor, limit
+            )
+            return make_page(
+                comments, limit, lambda comment: encode_cursor(comment.date, comment.id)
+            )
+
+    async def get_replies(
+        self, idd: int, per_parent: int | None = None
+    ) -> list[Comment]:
+        """
+        Method of receiving an approved comment with its approved replies
+        in thread order, optionally only the best rated replies of every comment
+        """
+        async with CommentUnitOfWork(session_factory=self.session) as uow:
+            comments = await uow.comments.get_subtree(idd, per_parent)
+        return _prune_thread(comments)
+
+    async def get_post_comments(
+        self,
+        post_id: int,
+        order: CommentOrder,
+        cursor: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> dict:
+        """Method of receiving a page of the comments of a post"""
+        async with CommentUnitOfWork(session_factory=self.session) as uow:
+            comments = await uow.comments.get_post_comments(
+                post_id, order, cursor, limit
+            )
+            return make_page(
+                comments,
+                limit,
+                lambda comment: encode_cursor(
+                    getattr(comment, order.value), comment.id
+                ),
+            )
+
+    async def export_comments(
+        self, specification: Specification, idd: int
+    ) -> AsyncIterator[str]:
+        """Method of exporting all matching comments as a stream of NDJSON lines"""
+        return _export_comments(specification, idd)
 
     async def change_comment(
         self, idd: int, post: CommentCreateSchema
@@ -41,11 +133,143 @@ class CommentService:
         async with CommentUnitOfWork(session_factory=self.session) as uow:
             result = await uow.comments.update(idd, post_dict)
             await uow.commit()
-            return result
+        if result is not None:
+            await COMMENTS_VERSION.bump()
+        return result
+
+    async def vote_comment(self, idd: int, user_id: int, vote: int) -> int | None:
+        """
+        Method of voting for a comment, the vote only touches redis and
+        the karma is updated by the worker. Returns the change of the karma
+        or None if there is no such comment
+        """
+        async with CommentUnitOfWork(session_factory=self.session) as uow:
+            if not await uow.comments.exists(idd):
+                return None
+        return await COMMENT_VOTES.vote(idd, user_id, vote)
+
+    async def moderate_comments(self, ids: list[int], approved: bool) -> list[int]:
+        """
+        Method of approving or rejecting many comments at once,
+        returns the IDs of the changed comments
+        """
+        async with CommentUnitOfWork(session_factory=self.session) as uow:
+            changed = await uow.comments.set_approved(ids, approved)
+            await uow.commit()
+        if changed:
+            # Cached pages are keyed by the version, so they all expire at once
+            await COMMENTS_VERSION.bump()
+        return changed
 
     async def delete_comment(self, idd: int) -> bool | None:
         """Method of deleting a comment"""
         async with CommentUnitOfWork(session_factory=self.session) as uow:
             result = await uow.comments.delete(idd)
             await uow.commit()
-            return result
+        if result is None:
+            return None
+        # The replies went with the comment, so all of them are taken off
+        # the count of the post while the parent loses only one reply
+        post_id, parent_id, removed_ids = result
+        await POST_COMMENTS_COUNTER.incr(post_id, -len(removed_ids))
+        if parent_id is not None:
+            await COMMENT_REPLIES_COUNTER.incr(parent_id, -1)
+        await COMMENT_VOTES.forget(removed_ids)
+        await COMMENT_KARMA_COUNTER.forget(removed_ids)
+        await COMMENT_REPLIES_COUNTER.forget(removed_ids)
+        await COMMENTS_VERSION.bump()
+        return True
+
+    async def flush_reply_counters(self) -> int:
+        """
+        Method of adding the buffered reply count deltas to the comments,
+        returns the number of updated comments
+        """
+        return await self._flush_counter(COMMENT_REPLIES_COUNTER, "comment_count")
+
+    async def flush_karma_counters(self) -> int:
+        """
+        Method of adding the buffered karma deltas of the votes to the comments,
+        returns the number of updated comments
+        """
+        return await self._flush_counter(COMMENT_KARMA_COUNTER, "karma")
+
+    async def reconcile_reply_counters(self) -> int:
+        """
+        Method of repairing the drift of the reply counters against
+        the comments table, range by range, returns the number of repaired
+        comments. Every range is read under the flush lock of the buffer, so
+        no deltas are added in between, and comments with buffered deltas are
+        left to the next run since their replies may be landing right now
+        """
+        batch_size = settings.worker.batch_size
+        after_id, repaired = 0, 0
+        while True:
+            async with COMMENT_REPLIES_COUNTER.lock(wait=True):
+                async with CommentUnitOfWork(session_factory=self.session) as uow:
+                    counts = await uow.comments.get_reply_counts(after_id, batch_size)
+                    if not counts:
+                        return repaired
+                    pending = await COMMENT_REPLIES_COUNTER.pending(
+                        idd for idd, _, _ in counts
+                    )
+                    fixes = {
+                        idd: actual
+                        for idd, stored, actual in counts
+                        if not pending[idd] and stored != actual
+                    }
+                    await uow.comments.set_column("comment_count", fixes)
+                    await uow.commit()
+            if fixes:
+                await COMMENTS_VERSION.bump()
+            repaired += len(fixes)
+            after_id = counts[-1][0]
+            if len(counts) < batch_size:
+                return repaired
+
+    async def reconcile_karma(self) -> int:
+        """
+        Method of repairing the drift of the karma against the votes kept
+        in redis, range by range, returns the number of repaired comments.
+        A flush that is applied twice is undone here, since the votes are
+        the only source of the karma. Every range is read under the flush lock
+        of the buffer and comments with buffered deltas are left to the next run
+        """
+        batch_size = settings.worker.batch_size
+        after_id, repaired = 0, 0
+        while True:
+            async with COMMENT_KARMA_COUNTER.lock(wait=True):
+                async with CommentUnitOfWork(session_factory=self.session) as uow:
+                    karma = await uow.comments.get_karma(after_id, batch_size)
+                    if not karma:
+                        return repaired
+                    ids = [idd for idd, _ in karma]
+                    pending = await COMMENT_KARMA_COUNTER.pending(ids)
+                    totals = await COMMENT_VOTES.totals(ids)
+                    fixes = {
+                        idd: totals[idd]
+                        for idd, stored in karma
+                        if not pending[idd] and stored != totals[idd]
+                    }
+                    await uow.comments.set_column("karma", fixes)
+                    await uow.commit()
+            if fixes:
+                await COMMENTS_VERSION.bump()
+            repaired += len(fixes)
+            after_id = karma[-1][0]
+            if len(karma) < batch_size:
+                return repaired
+
+    async def _flush_counter(self, counter, column_name: str) -> int:
+        """A method of adding the deltas of a counter buffer to a column in batches"""
+        batch_size = settings.worker.batch_size
+        async with counter.flush() as deltas:
+            items = sorted(deltas.items())
+            async with CommentUnitOfWork(session_factory=self.session) as uow:
+                for start in range(0, len(items), batch_size):
+                    batch = dict(items[start : start + batch_size])
+                    await uow.comments.increment_column(column_name, batch)
+                await uow.commit()
+        if items:
+            await COMMENTS_VERSION.bump()
+        return len(items)
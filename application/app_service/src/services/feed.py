@@ -0,0 +1,125 @@
+import math
+from itertools import chain
+from typing import AsyncGenerator
+
+from db.redis_config import redis
+from env_config import settings
+from log_config import add_logger, logged
+from unit_of_work.utils import FollowerUnitOfWork, PostUnitOfWork
+from utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor, encode_cursor, make_page
+
+logger = add_logger(__name__)
+
+CELEBRITIES_KEY: str = "feed:celebrities"
+
+
+def timeline_key(user_id: int) -> str:
+    """The key of the sorted set with the home timeline of a user"""
+    return f"feed:timeline:{user_id}"
+
+
+def author_key(user_id: int) -> str:
+    """The key of the sorted set with the latest posts of an author"""
+    return f"feed:author:{user_id}"
+
+
+@logged(logger)
+class FeedService:
+    """
+    A class that allows you to work with home timelines. Posts are pushed
+    to the timelines of the followers when they are created, the posts of
+    accounts with too many followers are pulled from their own sorted set
+    when the timeline is read
+    """
+
+    def __init__(self, session: AsyncGenerator) -> None:
+        self.session = session
+
+    async def push_posts(self, user_id: int, posts: dict[int, float]) -> None:
+        """Method of pushing new posts to the timelines of the author's followers"""
+        max_length = settings.feed.timeline_max_length
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(author_key(user_id), posts)
+            pipe.zremrangebyrank(author_key(user_id), 0, -max_length - 1)
+            pipe.sismember(CELEBRITIES_KEY, user_id)
+            *_, is_celebrity = await pipe.execute()
+        if is_celebrity:
+            return
+        pushed = 0
+        async with FollowerUnitOfWork(session_factory=self.session) as uow:
+            async for chunk in uow.followers.iter_follower_ids(
+                user_id, settings.feed.fanout_batch_size
+            ):
+                async with redis.pipeline(transaction=False) as pipe:
+                    for follower_id in chunk:
+                        pipe.zadd(timeline_key(follower_id), posts)
+                        pipe.zremrangebyrank(
+                            timeline_key(follower_id), 0, -max_length - 1
+                        )
+                    await pipe.execute()
+                pushed += len(chunk)
+                if pushed >= settings.feed.fanout_max_followers:
+                    # From now on the followers read this author's posts on their own
+                    logger.info("User %s is switched to fan-out on read", user_id)
+                    await redis.sadd(CELEBRITIES_KEY, user_id)
+                    return
+
+    async def remove_author(self, user_id: int, author_id: int) -> None:
+        """
+        Method of dropping the posts of an unfollowed author from the timeline
+        of a user, the latest posts of the author are kept in the author's set
+        """
+        post_ids = await redis.zrange(author_key(author_id), 0, -1)
+        if post_ids:
+            await redis.zrem(timeline_key(user_id), *post_ids)
+
+    async def get_feed(
+        self, user_id: int, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> dict:
+        """
+        Method of receiving a page of the home timeline, merging the pushed
+        timeline with the posts of followed accounts that are read on demand
+        """
+        max_score, max_id = math.inf, math.inf
+        if cursor:
+            try:
+                max_score, max_id = map(float, decode_cursor(cursor))
+            except (TypeError, ValueError) as exc:
+                raise ValueError("Invalid cursor.") from exc
+        keys = [timeline_key(user_id)]
+        celebrities = [int(idd) for idd in await redis.smembers(CELEBRITIES_KEY)]
+        if celebrities:
+            async with FollowerUnitOfWork(session_factory=self.session) as uow:
+                followed = await uow.followers.get_followed_among(user_id, celebrities)
+            keys.extend(author_key(idd) for idd in followed)
+        # Posts created or published together share a score and redis orders
+        # ties by member, not by id, so every tie group on the edge of a range
+        # is read whole and the entries are ordered by (score, id) here
+        upper = f"({max_score!r}" if cursor else "+inf"
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.zrevrangebyscore(
+                    key, upper, "-inf", start=0, num=limit + 1, withscores=True
+                )
+            ranges = await pipe.execute()
+        async with redis.pipeline(transaction=False) as pipe:
+            for key, head in zip(keys, ranges):
+                if cursor:
+                    pipe.zrangebyscore(key, max_score, max_score, withscores=True)
+                if len(head) > limit:
+                    low = head[-1][1]
+                    pipe.zrangebyscore(key, low, low, withscores=True)
+            ranges.extend(await pipe.execute())
+        entries = {}
+        for post_id, score in chain(*ranges):
+            if (score, int(post_id)) < (max_score, max_id):
+                entries[int(post_id)] = score
+        entries = sorted(entries.items(), key=lambda x: (x[1], x[0]), reverse=True)
+        page = make_page(
+            entries[: limit + 1], limit, lambda entry: encode_cursor(entry[1], entry[0])
+        )
+        async with PostUnitOfWork(session_factory=self.session) as uow:
+            page["items"] = await uow.posts.get_many(
+                [post_id for post_id, _ in page["items"]]
+            )
+        return page
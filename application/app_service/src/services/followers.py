@@ -1,13 +1,25 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, AsyncIterator
 
+from env_config import settings
 from log_config import add_logger, logged
-from models.users import User
-from unit_of_work.utils import FollowerUnitOfWork
+from unit_of_work.utils import FollowerUnitOfWork, UserUnitOfWork
+from utils.follow_lists import FOLLOW_LISTS, FOLLOWERS, FOLLOWING
+from utils.pagination import DEFAULT_PAGE_SIZE
+from utils.suggestions import USER_SUGGESTIONS
 
 
 logger = add_logger(__name__)
 
 
+async def _iter_follower_emails(session, idd: int) -> AsyncIterator[list[str]]:
+    """A function that yields the emails of the followers of a user in chunks"""
+    async with FollowerUnitOfWork(session_factory=session) as uow:
+        async for emails in uow.followers.iter_follower_emails(
+            idd, settings.rabbitmq.email_batch_size
+        ):
+            yield emails
+
+
 @logged(logger)
 class FollowerService:
     """A class that allows you to work with follower"""
@@ -15,22 +27,128 @@ class FollowerService:
     def __init__(self, session: AsyncGenerator) -> None:
         self.session = session
 
-    async def add_follower(self, username: str, added_username: str) -> None:
-        """Method of adding a new follower"""
+    async def add_follower(
+        self, idd: int, username: str, added_username: str
+    ) -> bool | None:
+        """
+        Method of following a user, returns False if the user is already followed
+        and None if there is no such user
+        """
         async with FollowerUnitOfWork(session_factory=self.session) as uow:
-            follower = await uow.followers.add_follower(username, added_username)
+            follower = await uow.followers.add_follower(idd, added_username)
             await uow.commit()
-            return follower
+        if follower:
+            await FOLLOW_LISTS.add(username, [added_username])
+            await USER_SUGGESTIONS.remove(idd, [added_username])
+        return follower
+
+    async def iter_follower_emails(self, idd: int) -> AsyncIterator[list[str]]:
+        """Method of receiving the emails of the followers in chunks"""
+        return _iter_follower_emails(self.session, idd)
 
-    async def get_followers(self, idd: int) -> list[User]:
-        """Method of receiving followers"""
+    async def add_followers(
+        self, idd: int, username: str, usernames: list[str]
+    ) -> dict:
+        """
+        Method of following many users at once, reports which usernames were
+        followed, which were already followed and which are unknown
+        """
         async with FollowerUnitOfWork(session_factory=self.session) as uow:
-            followers = await uow.followers.get_followers(idd)
-            return followers
+            followed = await uow.followers.add_followers(idd, usernames)
+            await uow.commit()
+        added = [name for name, is_added in followed.items() if is_added]
+        await FOLLOW_LISTS.add(username, added)
+        await USER_SUGGESTIONS.remove(idd, added)
+        return {
+            "followed": added,
+            "already_followed": [name for name, added in followed.items() if not added],
+            "unknown": sorted(set(usernames) - set(followed)),
+        }
 
-    async def delete_follower(self, username: str, remove_username: str) -> bool | None:
-        """Method of deleting a follower"""
+    async def delete_follower(
+        self, idd: int, username: str, remove_username: str, feeds_service
+    ) -> bool | None:
+        """
+        Method of unfollowing a user and dropping the user's posts from
+        the timeline, returns False if the user is not followed and None
+        if there is no such user
+        """
         async with FollowerUnitOfWork(session_factory=self.session) as uow:
-            follower = await uow.followers.delete_follower(username, remove_username)
+            removed_id, follower = await uow.followers.delete_follower(
+                idd, remove_username
+            )
             await uow.commit()
-            return follower
+        if removed_id is None:
+            return None
+        if follower:
+            await FOLLOW_LISTS.remove(username, remove_username)
+            await feeds_service.remove_author(idd, removed_id)
+        return follower
+
+    async def get_followers_page(
+        self, username: str, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> dict | None:
+        """
+        Method of receiving a page of the followers of a user and their number,
+        returns None if there is no such user
+        """
+        return await self._follow_list_page(FOLLOWERS, username, cursor, limit)
+
+    async def get_following_page(
+        self, username: str, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> dict | None:
+        """
+        Method of receiving a page of the users followed by a user
+        and their number, returns None if there is no such user
+        """
+        return await self._follow_list_page(FOLLOWING, username, cursor, limit)
+
+    async def _follow_list_page(
+        self, kind: str, username: str, cursor: str | None, limit: int
+    ) -> dict | None:
+        """
+        A method of receiving a page of a follow list, the database is asked
+        whether the user exists only when the list is empty
+        """
+        page = await FOLLOW_LISTS.page(kind, username, cursor, limit)
+        if not page["count"]:
+            async with UserUnitOfWork(session_factory=self.session) as uow:
+                if await uow.users.get_principal(username) is None:
+                    return None
+        return page
+
+    async def rebuild_follow_lists(self) -> int:
+        """
+        Method of repopulating the redis follow lists of all users from
+        user_following, returns the number of rebuilt users. Every chunk is
+        swapped in right after it is read, so a follow committed in between
+        can only be lost for the moment it takes to build the chunk
+        """
+        rebuilt = 0
+        async with FollowerUnitOfWork(session_factory=self.session) as uow:
+            async for chunk in uow.followers.iter_follow_graph(
+                settings.worker.batch_size
+            ):
+                await FOLLOW_LISTS.replace(
+                    chunk["usernames"], chunk["followers"], chunk["following"]
+                )
+                rebuilt += len(chunk["usernames"])
+        return rebuilt
+
+    async def get_suggestions(self, idd: int, limit: int) -> list[dict]:
+        """Method of receiving the precomputed suggestions of whom to follow"""
+        return await USER_SUGGESTIONS.get(idd, limit)
+
+    async def compute_suggestions(self) -> int:
+        """
+        Method of recomputing the friend-of-friend suggestions of all users,
+        returns the number of users that got suggestions
+        """
+        suggested = 0
+        async with FollowerUnitOfWork(session_factory=self.session) as uow:
+            async for ids, suggestions in uow.followers.iter_suggestions(
+                settings.worker.batch_size, settings.worker.suggestions_size
+            ):
+                await USER_SUGGESTIONS.replace(ids, suggestions)
+                suggested += len(suggestions)
+        return suggested
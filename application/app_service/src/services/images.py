@@ -3,6 +3,7 @@ from typing import AsyncGenerator
 from log_config import add_logger, logged
 from schemas.images import ImageSchema
 from unit_of_work.utils import ImageUnitOfWork
+from utils.etag import POSTS_VERSION
 
 logger = add_logger(__name__)
 
@@ -15,9 +16,10 @@ class ImageService:
         self.session = session
 
     async def create_image(self, data: ImageSchema) -> int:
-        """Image creation method"""
+        """Image creation method, the images are a part of the posts"""
         image_dict = data.model_dump()
         async with ImageUnitOfWork(session_factory=self.session) as uow:
             image_id = await uow.images.add(image_dict)
             await uow.commit()
-            return image_id
+        await POSTS_VERSION.bump()
+        return image_id
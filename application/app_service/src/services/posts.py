@@ -1,17 +1,75 @@
 import json
-from typing import Sequence, AsyncGenerator
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import AsyncGenerator, AsyncIterator, Sequence
+
+import numpy as np
 
 from config import RabbitMQClient
+from db.db_config import async_session
 from env_config import settings
 from log_config import add_logger, logged
 from models.posts import Post
-from schemas.posts import PostCreateSchema
+from schemas.posts import PostCreateSchema, PostSchema
 from unit_of_work.utils import PostUnitOfWork
-from utils.specification import Specification
+from utils.common import Status
+from utils.counters import (
+    COMMENT_KARMA_COUNTER,
+    COMMENT_REPLIES_COUNTER,
+    POST_COMMENTS_COUNTER,
+)
+from utils.etag import COMMENTS_VERSION, POSTS_VERSION
+from utils.pagination import DEFAULT_PAGE_SIZE, encode_cursor, make_page
+from utils.specification import Specification, SearchSpecification
+from utils.trending import (
+    TRENDING_POSTS,
+    add_comment_scores,
+    top_scores,
+    view_scores,
+)
+from utils.views import POST_VIEWS_COUNTER
+from utils.votes import COMMENT_VOTES
 
 logger = add_logger(__name__)
 
 
+def _schedule(post_dict: dict) -> dict:
+    """A function that marks a post with a publication time as a future one"""
+    if post_dict["publish_at"] is not None:
+        post_dict["status"] = Status.FUTURE
+    else:
+        post_dict["status"] = Status.PUBLISHED
+    return post_dict
+
+
+def _connect_email_queue() -> RabbitMQClient:
+    """
+    A function that connects to the queue of the notification service, which
+    notifies the followers of the creation of new posts
+    """
+    client = RabbitMQClient(
+        host=settings.rabbitmq.rabbitmq_host, port=settings.rabbitmq.rabbitmq_port
+    )
+    client.channel.queue_declare(queue="email")
+    return client
+
+
+async def _export_posts(specification: Specification) -> AsyncIterator[str]:
+    """
+    A function that yields the posts as NDJSON lines. It opens its own session
+    because the request session is closed before a streamed body is sent
+    """
+    async with async_session() as session:
+        async with PostUnitOfWork(session_factory=session) as uow:
+            async for post in uow.posts.stream(
+                specification, settings.worker.batch_size
+            ):
+                # The images of a post are ORM objects inside the dict
+                post = PostSchema.model_validate(post, from_attributes=True)
+                yield post.model_dump_json() + "\n"
+
+
 @logged(logger)
 class PostService:
     """A class that allows you to work with post"""
@@ -24,22 +82,205 @@ class PostService:
         post: PostCreateSchema,
         user_id: int,
         followers_service,
+        feeds_service,
     ) -> int:
-        """The method of creating a post and sending data to the notification service"""
-        post_dict = post.model_dump()
+        """
+        The method of creating a post, pushing it to the followers' timelines
+        and sending data to the notification service
+        """
+        post_dict = _schedule(post.model_dump())
         async with PostUnitOfWork(session_factory=self.session) as uow:
             post_id = await uow.posts.add(post_dict)
             await uow.commit()
-        followers_emails = await followers_service.get_followers(user_id)
-        data = {"user_id": user_id, "post_id": post_id, "emails": followers_emails}
-        await self._send_email(json.dumps(data))
+        await POSTS_VERSION.bump()
+        if post_dict["status"] == Status.FUTURE:
+            # The followers are notified by the scheduler when it is published
+            return post_id
+        await self._notify_followers(
+            {user_id: [post_id]}, followers_service, feeds_service
+        )
         return post_id
 
-    async def get_posts(self, specification: Specification) -> Sequence[Post]:
-        """Method of receiving posts"""
+    async def create_posts_and_send_emails(
+        self,
+        posts: list[PostCreateSchema],
+        followers_service,
+        feeds_service,
+    ) -> list[int]:
+        """
+        The method of creating a batch of posts with one statement and sending
+        one notification per author instead of one per post
+        """
+        posts_dicts = [_schedule(post.model_dump()) for post in posts]
+        async with PostUnitOfWork(session_factory=self.session) as uow:
+            post_ids = await uow.posts.add_many(posts_dicts)
+            await uow.commit()
+        await POSTS_VERSION.bump()
+        authors_posts = defaultdict(list)
+        for post_dict, post_id in zip(posts_dicts, post_ids):
+            if post_dict["status"] != Status.FUTURE:
+                authors_posts[post_dict["author_id"]].append(post_id)
+        await self._notify_followers(authors_posts, followers_service, feeds_service)
+        return post_ids
+
+    async def publish_due_posts(self, followers_service, feeds_service) -> int:
+        """
+        Method of publishing the scheduled posts whose time has come. Batches are
+        claimed with FOR UPDATE SKIP LOCKED, so several workers never publish
+        the same post, returns the number of published posts. The followers
+        are notified before the claim is committed, so the services of
+        the followers and of the feeds have to work in another session
+        """
+        batch_size = settings.worker.batch_size
+        published = 0
+        while True:
+            async with PostUnitOfWork(session_factory=self.session) as uow:
+                posts = await uow.posts.publish_due(batch_size)
+                authors_posts = defaultdict(list)
+                for post_id, author_id in posts:
+                    authors_posts[author_id].append(post_id)
+                # A failed notification rolls the claim back and the posts stay
+                # scheduled for the next run, so every post is notified at least once
+                await self._notify_followers(
+                    authors_posts, followers_service, feeds_service
+                )
+                await uow.commit()
+            if posts:
+                await POSTS_VERSION.bump()
+            published += len(posts)
+            if len(posts) < batch_size:
+                return published
+
+    async def _notify_followers(
+        self, authors_posts: dict[int, list[int]], followers_service, feeds_service
+    ) -> None:
+        """
+        A method of pushing new posts to the followers' timelines and sending
+        the notifications of every author in chunks of followers' emails,
+        one message per chunk over one connection
+        """
+        score = time.time()
+        client = None
+        try:
+            for author_id, author_post_ids in authors_posts.items():
+                await feeds_service.push_posts(
+                    author_id, {post_id: score for post_id in author_post_ids}
+                )
+                chunks = await followers_service.iter_follower_emails(author_id)
+                async for emails in chunks:
+                    if client is None:
+                        client = _connect_email_queue()
+                    data = {
+                        "user_id": author_id,
+                        "post_ids": author_post_ids,
+                        "emails": emails,
+                    }
+                    client.public(exchange="", route_key="email", body=json.dumps(data))
+        finally:
+            if client is not None:
+                client.close()
+
+    async def get_posts(
+        self,
+        specification: Specification,
+        cursor: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        fields: Sequence[str] | None = None,
+        with_comments: int | None = None,
+    ) -> dict:
+        """
+        Method of receiving a page of posts, optionally with only the given fields
+        and with the best rated comments of every post
+        """
+        async with PostUnitOfWork(session_factory=self.session) as uow:
+            posts = await uow.posts.list(
+                specification, cursor, limit, fields, with_comments
+            )
+        page = make_page(
+            posts, limit, lambda post: encode_cursor(post["date"], post["id"])
+        )
+        if fields is not None:
+            names = ("id", *fields, *(("comments",) if with_comments else ()))
+            page["items"] = [
+                {name: post[name] for name in names} for post in page["items"]
+            ]
+        return page
+
+    async def export_posts(self, specification: Specification) -> AsyncIterator[str]:
+        """Method of exporting all matching posts as a stream of NDJSON lines"""
+        return _export_posts(specification)
+
+    async def get_post(self, idd: int, viewer_id: int) -> dict | None:
+        """
+        Method of receiving a post and recording the view, the number of views
+        is taken from redis because the column lags behind until the next flush
+        """
+        async with PostUnitOfWork(session_factory=self.session) as uow:
+            post = await uow.posts.get_post(idd)
+        if post is None:
+            return None
+        post["view_count"] = await self.record_view(idd, viewer_id)
+        return post
+
+    async def record_view(self, idd: int, viewer_id: int) -> int:
+        """
+        Method of recording a view of an existing post, returns the number
+        of views. Recording the same viewer again does not change the number
+        """
+        await POST_VIEWS_COUNTER.record(idd, viewer_id)
+        return await POST_VIEWS_COUNTER.count(idd)
+
+    async def get_trending_posts(
+        self, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Sequence[dict]:
+        """Method of receiving the trending posts from the precomputed ranking"""
+        ids = await TRENDING_POSTS.top(limit)
+        async with PostUnitOfWork(session_factory=self.session) as uow:
+            return await uow.posts.get_many(ids)
+
+    async def rank_trending_posts(self) -> int:
+        """
+        Method of recomputing the ranking of the trending posts from the comments
+        and views within the window, returns the number of ranked posts.
+        The comments are folded into the scores chunk by chunk, so only one
+        chunk of them is held in memory at a time
+        """
+        conf = settings.trending
+        half_life = conf.half_life_hours * 3600
+        window = timedelta(hours=conf.window_hours)
+        async with PostUnitOfWork(session_factory=self.session) as uow:
+            posts = await uow.posts.get_recent_activity(window)
+            ids, scores = view_scores(
+                np.array(posts, dtype=float).reshape(-1, 3),
+                half_life,
+                conf.view_weight,
+            )
+            async for chunk in uow.posts.iter_recent_comments(
+                window, settings.worker.batch_size
+            ):
+                add_comment_scores(
+                    ids,
+                    scores,
+                    np.array(chunk, dtype=float).reshape(-1, 3),
+                    half_life,
+                    conf.karma_weight,
+                )
+        scores = top_scores(ids, scores, conf.size)
+        await TRENDING_POSTS.replace(scores)
+        return len(scores)
+
+    async def search_posts(
+        self,
+        specification: SearchSpecification,
+        cursor: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> dict:
+        """Method of searching posts, ranked by relevance"""
         async with PostUnitOfWork(session_factory=self.session) as uow:
-            posts = await uow.posts.list(specification)
-            return posts
+            posts = await uow.posts.search(specification, cursor, limit)
+            return make_page(
+                posts, limit, lambda post: encode_cursor(post["rank"], post["id"])
+            )
 
     async def change_post(self, idd: int, post: PostCreateSchema) -> Post | None:
         """Method of changing post"""
@@ -47,22 +288,116 @@ class PostService:
         async with PostUnitOfWork(session_factory=self.session) as uow:
             post = await uow.posts.update(idd, post_dict)
             await uow.commit()
-            return post
+        if post is not None:
+            await POSTS_VERSION.bump()
+        return post
 
     async def delete_post(self, idd: int) -> bool | None:
-        """Method of removing post"""
+        """Method of removing post with its comments"""
         async with PostUnitOfWork(session_factory=self.session) as uow:
-            result = await uow.posts.delete(idd)
+            comment_ids = await uow.posts.delete_post(idd)
             await uow.commit()
-            return result
+        if comment_ids is None:
+            return None
+        await POST_VIEWS_COUNTER.forget([idd])
+        await POST_COMMENTS_COUNTER.forget([idd])
+        await POSTS_VERSION.bump()
+        if comment_ids:
+            await COMMENT_VOTES.forget(comment_ids)
+            await COMMENT_KARMA_COUNTER.forget(comment_ids)
+            await COMMENT_REPLIES_COUNTER.forget(comment_ids)
+            await COMMENTS_VERSION.bump()
+        return True
 
-    @classmethod
-    async def _send_email(cls, body: str | bytes) -> None:
+    async def flush_comment_counters(self) -> int:
         """
-        A method of sending data to a media service to notify followers of the
-        creation of a new post
+        Method of adding the buffered comment count deltas to the posts,
+        returns the number of updated posts
         """
-        client = RabbitMQClient(
-            host=settings.rabbitmq_host, port=settings.rabbitmq_port
-        )
-        client.public_basic(queue="email", exchange="", route_key="email", body=body)
+        batch_size = settings.worker.batch_size
+        async with POST_COMMENTS_COUNTER.flush() as deltas:
+            items = sorted(deltas.items())
+            async with PostUnitOfWork(session_factory=self.session) as uow:
+                for start in range(0, len(items), batch_size):
+                    batch = dict(items[start : start + batch_size])
+                    await uow.posts.increment_column("comment_count", batch)
+                await uow.commit()
+        if items:
+            await POSTS_VERSION.bump()
+        return len(items)
+
+    async def reconcile_comment_counters(self) -> int:
+        """
+        Method of repairing the drift of the comment counters against
+        the comments table, range by range, returns the number of repaired posts.
+        Every range is read under the flush lock of the buffer, so no deltas
+        are added in between, and posts with buffered deltas are left to
+        the next run since their comments may be landing right now
+        """
+        batch_size = settings.worker.batch_size
+        after_id, repaired = 0, 0
+        while True:
+            async with POST_COMMENTS_COUNTER.lock(wait=True):
+                async with PostUnitOfWork(session_factory=self.session) as uow:
+                    counts = await uow.posts.get_comment_counts(after_id, batch_size)
+                    if not counts:
+                        return repaired
+                    pending = await POST_COMMENTS_COUNTER.pending(
+                        idd for idd, _, _ in counts
+                    )
+                    fixes = {
+                        idd: actual
+                        for idd, stored, actual in counts
+                        if not pending[idd] and stored != actual
+                    }
+                    await uow.posts.set_column("comment_count", fixes)
+                    await uow.commit()
+            if fixes:
+                await POSTS_VERSION.bump()
+            repaired += len(fixes)
+            after_id = counts[-1][0]
+            if len(counts) < batch_size:
+                return repaired
+
+    async def purge_trash_batch(self) -> tuple[int, int, int]:
+        """
+        Method of hard-deleting one batch of trashed posts older than
+        the retention window and dropping their state in redis, returns
+        the numbers of deleted posts, images and comments
+        """
+        retention = timedelta(days=settings.worker.trash_retention_days)
+        async with PostUnitOfWork(session_factory=self.session) as uow:
+            post_ids, images, comment_ids = await uow.posts.purge_trash(
+                retention, settings.worker.purge_batch_size
+            )
+            await uow.commit()
+        if post_ids:
+            await POST_VIEWS_COUNTER.forget(post_ids)
+            await POST_COMMENTS_COUNTER.forget(post_ids)
+            await POSTS_VERSION.bump()
+        if comment_ids:
+            await COMMENT_VOTES.forget(comment_ids)
+            await COMMENT_KARMA_COUNTER.forget(comment_ids)
+            await COMMENT_REPLIES_COUNTER.forget(comment_ids)
+        return len(post_ids), images, len(comment_ids)
+
+    async def flush_view_counts(self) -> int:
+        """
+        Method of persisting the approximate numbers of unique views
+        of the recently viewed posts, returns the number of updated posts
+        """
+        updated = 0
+        while True:
+            counts = await POST_VIEWS_COUNTER.pop_dirty(settings.worker.batch_size)
+            if not counts:
+                if updated:
+                    await POSTS_VERSION.bump()
+                return updated
+            try:
+                async with PostUnitOfWork(session_factory=self.session) as uow:
+                    await uow.posts.set_column("view_count", counts)
+                    await uow.commit()
+            except Exception:
+                await POST_VIEWS_COUNTER.mark_dirty(list(counts))
+                raise
+            updated += len(counts)
@@ -1,9 +1,12 @@
 from typing import AsyncGenerator
 
+from auth.pool import PASSWORD_POOL
+from auth.utils import hash_password
 from log_config import add_logger, logged
 from models.users import User
-from schemas.users import UserCreateSchema
+from schemas.users import UserCreateSchema, PrincipalSchema
 from unit_of_work.utils import UserUnitOfWork
+from utils.principals import PRINCIPALS
 
 logger = add_logger(__name__)
 
@@ -16,15 +19,27 @@ class UserService:
         self.session = session
 
     async def create_user(self, user: UserCreateSchema) -> int:
-        """User creation method"""
+        """User creation method, the password is hashed off the event loop"""
         user_dict = user.model_dump()
+        user_dict["password"] = await PASSWORD_POOL.run(hash_password, user.password)
         async with UserUnitOfWork(session_factory=self.session) as uow:
             user_id = await uow.users.add(user_dict)
             await uow.commit()
-            return user_id
+        await PRINCIPALS.invalidate(user.username)
+        return user_id
 
     async def get_user(self, name: str) -> User | None:
         """Method of receiving a one user"""
         async with UserUnitOfWork(session_factory=self.session) as uow:
             user = await uow.users.get(name)
             return user
+
+    async def get_principal(self, name: str) -> PrincipalSchema | None:
+        """Method of receiving the authenticated principal, cached in front of the database"""
+        return await PRINCIPALS.get(name, self.load_principal)
+
+    async def load_principal(self, name: str) -> PrincipalSchema | None:
+        """Method of receiving the authenticated principal from the database"""
+        async with UserUnitOfWork(session_factory=self.session) as uow:
+            principal = await uow.users.get_principal(name)
+            return PrincipalSchema.model_validate(principal) if principal else None
@@ -0,0 +1,281 @@
+import os
+import sys
+
+import aioredis
+import pytest
+from sqlalchemy import update
+
+sys.path.append(os.getcwd())
+from env_config import settings
+from models.comments import Comment
+from repositories.comments import SQLAlchemyCommentRepository
+from tests.factories.factory_boy import session
+
+
+def create_comment(db_client, token, post, parent_id=None) -> int:
+    data = {
+        "content": "content",
+        "type": "textual",
+        "author_id": post.author_id,
+        "post_id": post.id,
+        "parent_id": parent_id,
+    }
+    response = db_client.post("/comments/", json=data, headers={"Authorization": token})
+    assert response.status_code == 201
+    return response.json()["comment_id"]
+
+
+@pytest.fixture
+def thread(db_client, get_access_token, post_factory, user_factory):
+    async def create():
+        user = user_factory.create()
+        await session.commit()
+        post = post_factory.create(author_id=user.id)
+        await session.commit()
+        root = create_comment(db_client, get_access_token, post)
+        worse = create_comment(db_client, get_access_token, post, root)
+        better = create_comment(db_client, get_access_token, post, root)
+        nested = create_comment(db_client, get_access_token, post, worse)
+        # The karma is folded in from the votes by the worker
+        await session.execute(
+            update(Comment).where(Comment.id == better).values(karma=5)
+        )
+        await session.commit()
+        return root, worse, better, nested
+
+    return create
+
+
+@pytest.mark.asyncio
+async def test_get_replies_in_thread_order(db_client, get_access_token, thread):
+    root, worse, better, nested = await thread()
+    response = db_client.get(
+        f"/comments/{root}/replies", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    assert [comment["id"] for comment in response.json()] == [
+        root,
+        worse,
+        nested,
+        better,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_replies_per_parent_prunes_cut_replies(
+    db_client, get_access_token, thread
+):
+    root, worse, better, nested = await thread()
+    response = db_client.get(
+        f"/comments/{root}/replies?per_parent=1",
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 200
+    assert [comment["id"] for comment in response.json()] == [root, better]
+
+
+@pytest.mark.asyncio
+async def test_get_replies_hides_rejected_comments(db_client, get_access_token, thread):
+    root, worse, better, nested = await thread()
+    response = db_client.patch(
+        "/comments/moderation",
+        json={"ids": [worse], "approved": False},
+        headers={"Authorization": get_access_token},
+    )
+    assert response.json() == {"comment_ids": [worse]}
+
+    response = db_client.get(
+        f"/comments/{root}/replies", headers={"Authorization": get_access_token}
+    )
+    assert [comment["id"] for comment in response.json()] == [root, better]
+    response = db_client.get(
+        f"/comments/{worse}/replies", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_replies_of_missing_comment(db_client, get_access_token):
+    response = db_client.get(
+        "/comments/100000/replies", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_create_reply_to_comment_of_another_post(
+    db_client, get_access_token, post_factory, user_factory
+):
+    user = user_factory.create()
+    await session.commit()
+    first, second = post_factory.create_batch(2, author_id=user.id)
+    await session.commit()
+    parent_id = create_comment(db_client, get_access_token, first)
+    data = {
+        "content": "content",
+        "type": "textual",
+        "author_id": user.id,
+        "post_id": second.id,
+        "parent_id": parent_id,
+    }
+    response = db_client.post(
+        "/comments/", json=data, headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_post_comments_pages_through_equal_karma(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+    comment_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post = post_factory.create(author_id=user.id)
+    await session.commit()
+    comments = comment_factory.create_batch(
+        5, karma=3, author_id=user.id, post_id=post.id
+    )
+    await session.commit()
+
+    ids, cursor = [], None
+    while True:
+        url = f"/posts/{post.id}/comments?order=karma&limit=2"
+        response = db_client.get(
+            url + (f"&cursor={cursor}" if cursor else ""),
+            headers={"Authorization": get_access_token},
+        )
+        assert response.status_code == 200
+        ids.extend(comment["id"] for comment in response.json()["items"])
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == sorted((comment.id for comment in comments), reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_get_post_comments_hides_rejected_comments(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+    comment_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post = post_factory.create(author_id=user.id)
+    await session.commit()
+    approved = comment_factory.create(author_id=user.id, post_id=post.id)
+    comment_factory.create(approved=False, author_id=user.id, post_id=post.id)
+    await session.commit()
+    response = db_client.get(
+        f"/posts/{post.id}/comments", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    assert [comment["id"] for comment in response.json()["items"]] == [approved.id]
+
+
+@pytest.mark.asyncio
+async def test_get_post_comments_invalid_cursor(
+    db_client, get_access_token, post_factory, user_factory
+):
+    user = user_factory.create()
+    await session.commit()
+    post = post_factory.create(author_id=user.id)
+    await session.commit()
+    response = db_client.get(
+        f"/posts/{post.id}/comments?order=karma&cursor=invalid",
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_vote_comment_counts_a_voter_once(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post = post_factory.create(author_id=user.id)
+    await session.commit()
+    comment_id = create_comment(db_client, get_access_token, post)
+    for vote, changed in ((1, True), (1, False), (-1, True), (0, True)):
+        response = db_client.put(
+            f"/comments/{comment_id}/vote",
+            json={"vote": vote},
+            headers={"Authorization": get_access_token},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"result": changed}
+
+
+@pytest.mark.asyncio
+async def test_vote_missing_comment(db_client, get_access_token):
+    response = db_client.put(
+        "/comments/100000/vote",
+        json={"vote": 1},
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_reply_counts_counts_the_direct_replies(db_client, thread):
+    root, worse, better, nested = await thread()
+    repository = SQLAlchemyCommentRepository(session)
+    # The replies are buffered in redis, so the stored counts are still 0
+    assert await repository.get_reply_counts(root - 1, 10) == [
+        (root, 0, 2),
+        (worse, 0, 1),
+        (better, 0, 0),
+        (nested, 0, 0),
+    ]
+    assert await repository.get_reply_counts(root, 2) == [(worse, 0, 1), (better, 0, 0)]
+
+
+@pytest.mark.asyncio
+async def test_delete_comment_forgets_the_votes_of_its_replies(
+    db_client, get_access_token, thread
+):
+    root, worse, better, nested = await thread()
+    for comment_id in (root, nested):
+        response = db_client.put(
+            f"/comments/{comment_id}/vote",
+            json={"vote": 1},
+            headers={"Authorization": get_access_token},
+        )
+        assert response.status_code == 200
+    response = db_client.delete(
+        f"/comments/{root}", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    response = db_client.get(
+        f"/comments/{nested}/replies", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 404
+    redis = aioredis.from_url(f"redis://{settings.redis.redis_host}")
+    for comment_id in (root, worse, better, nested):
+        assert not await redis.exists(f"votes:comments:{comment_id}")
+    await redis.close()
+
+
+@pytest.mark.asyncio
+async def test_change_comment_ignores_karma(db_client, get_access_token, thread):
+    root, *_ = await thread()
+    response = db_client.patch(
+        f"/comments/{root}",
+        json={"content": "changed", "karma": 100},
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 200
+    response = db_client.get(
+        f"/comments/{root}/replies", headers={"Authorization": get_access_token}
+    )
+    assert response.json()[0]["content"] == "changed"
+    assert response.json()[0]["karma"] == 0
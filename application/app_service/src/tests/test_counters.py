@@ -0,0 +1,53 @@
+import os
+import sys
+
+import aioredis
+import pytest
+import pytest_asyncio
+
+sys.path.append(os.getcwd())
+from env_config import settings
+from utils.counters import RedisCounterBuffer
+from utils.votes import RedisVotes
+
+
+@pytest_asyncio.fixture
+async def redis_cli():
+    redis = aioredis.from_url(f"redis://{settings.redis.redis_host}")
+    yield redis
+    keys = await redis.keys("tests:*")
+    if keys:
+        await redis.delete(*keys)
+    await redis.close()
+
+
+@pytest.mark.asyncio
+async def test_lock_is_taken_once(redis_cli):
+    buffer = RedisCounterBuffer(redis_cli, "tests:counter")
+    async with buffer.lock() as locked:
+        assert locked
+        async with buffer.lock() as again:
+            assert not again
+    assert not await redis_cli.exists(buffer.lock_key)
+
+
+@pytest.mark.asyncio
+async def test_lock_taken_over_after_expiry_is_not_released(redis_cli):
+    buffer = RedisCounterBuffer(redis_cli, "tests:counter")
+    async with buffer.lock() as locked:
+        assert locked
+        # The lock expired and another worker took it
+        await redis_cli.set(buffer.lock_key, "another")
+    assert await redis_cli.get(buffer.lock_key) == b"another"
+
+
+@pytest.mark.asyncio
+async def test_votes_totals(redis_cli):
+    votes = RedisVotes(
+        redis_cli, "tests:votes", RedisCounterBuffer(redis_cli, "tests:karma")
+    )
+    await votes.vote(1, 10, 1)
+    await votes.vote(1, 11, 1)
+    await votes.vote(2, 10, -1)
+    assert await votes.totals([1, 2, 3]) == {1: 2, 2: -1, 3: 0}
+    assert await redis_cli.hgetall("tests:karma") == {b"1": b"2", b"2": b"-1"}
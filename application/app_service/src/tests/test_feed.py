@@ -0,0 +1,112 @@
+import os
+import sys
+
+import aioredis
+import pytest
+
+sys.path.append(os.getcwd())
+from auth.utils import decode_jwt
+from env_config import settings
+from services.feed import author_key, timeline_key
+from tests.factories.factory_boy import session
+
+
+async def push_to_timeline(user_id: int, posts: dict[int, float]) -> None:
+    redis = aioredis.from_url(f"redis://{settings.redis.redis_host}")
+    await redis.delete(timeline_key(user_id))
+    await redis.zadd(timeline_key(user_id), posts)
+    await redis.close()
+
+
+@pytest.mark.asyncio
+async def test_get_feed_pages_through_tied_scores(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+):
+    user_id = int(decode_jwt(get_access_token.split()[1])["sub"])
+    author = user_factory.create()
+    await session.commit()
+    posts = post_factory.create_batch(12, author_id=author.id, status="PUBLISHED")
+    await session.commit()
+    # A bulk create pushes every post of the batch with the same score
+    await push_to_timeline(user_id, {post.id: 1.0 for post in posts})
+
+    ids, cursor = [], None
+    while True:
+        url = "/feed/?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        response = db_client.get(url, headers={"Authorization": get_access_token})
+        assert response.status_code == 200
+        assert len(response.json()["items"]) <= 2
+        ids.extend(post["id"] for post in response.json()["items"])
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == sorted((post.id for post in posts), reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_get_feed_orders_by_score_then_id(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+):
+    user_id = int(decode_jwt(get_access_token.split()[1])["sub"])
+    author = user_factory.create()
+    await session.commit()
+    first, second, third = post_factory.create_batch(
+        3, author_id=author.id, status="PUBLISHED"
+    )
+    await session.commit()
+    await push_to_timeline(user_id, {first.id: 2.0, second.id: 1.0, third.id: 1.0})
+
+    response = db_client.get(
+        "/feed/?limit=1", headers={"Authorization": get_access_token}
+    )
+    assert [post["id"] for post in response.json()["items"]] == [first.id]
+    response = db_client.get(
+        f"/feed/?limit=5&cursor={response.json()['next_cursor']}",
+        headers={"Authorization": get_access_token},
+    )
+    assert [post["id"] for post in response.json()["items"]] == [third.id, second.id]
+    assert response.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_feed_invalid_cursor(db_client, get_access_token):
+    response = db_client.get(
+        "/feed/?cursor=invalid", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_unfollow_drops_the_author_from_the_feed(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+):
+    user_id = int(decode_jwt(get_access_token.split()[1])["sub"])
+    author, other = user_factory.create_batch(2)
+    await session.commit()
+    dropped = post_factory.create(author_id=author.id, status="PUBLISHED")
+    kept = post_factory.create(author_id=other.id, status="PUBLISHED")
+    await session.commit()
+    response = db_client.post(
+        f"/followers/{author.username}", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 201
+    await push_to_timeline(user_id, {dropped.id: 2.0, kept.id: 1.0})
+    redis = aioredis.from_url(f"redis://{settings.redis.redis_host}")
+    await redis.zadd(author_key(author.id), {dropped.id: 2.0})
+    await redis.close()
+
+    response = db_client.delete(
+        f"/followers/{author.username}", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    response = db_client.get("/feed/", headers={"Authorization": get_access_token})
+    assert [post["id"] for post in response.json()["items"]] == [kept.id]
@@ -0,0 +1,166 @@
+import os
+import sys
+
+import aioredis
+import pytest
+from sqlalchemy import insert
+
+sys.path.append(os.getcwd())
+from auth.utils import decode_jwt
+from env_config import settings
+from models.users import user_following
+from repositories.followers import SQLAlchemyFollowerRepository
+from tests.factories.factory_boy import session
+
+
+@pytest.mark.asyncio
+async def test_follow_and_unfollow_user(db_client, get_access_token, user_factory):
+    user = user_factory.create()
+    await session.commit()
+    headers = {"Authorization": get_access_token}
+
+    response = db_client.post(f"/followers/{user.username}", headers=headers)
+    assert response.status_code == 201
+    assert response.json() == {"result": True}
+    response = db_client.post(f"/followers/{user.username}", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "This user is already on the list of followers."
+
+    response = db_client.delete(f"/followers/{user.username}", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"result": True}
+    response = db_client.delete(f"/followers/{user.username}", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "This user is not on the list of followers."
+
+
+@pytest.mark.parametrize("method", ("post", "delete"))
+@pytest.mark.asyncio
+async def test_follow_unknown_user(db_client, get_access_token, method):
+    response = db_client.request(
+        method, "/followers/unknown", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Follower does not exist."
+
+
+@pytest.mark.asyncio
+async def test_follow_users_in_bulk(db_client, get_access_token, user_factory):
+    followed, new = user_factory.create_batch(2)
+    await session.commit()
+    headers = {"Authorization": get_access_token}
+    db_client.post(f"/followers/{followed.username}", headers=headers)
+
+    response = db_client.post(
+        "/followers/bulk",
+        json={"usernames": [followed.username, new.username, "unknown"]},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    assert response.json() == {
+        "followed": [new.username],
+        "already_followed": [followed.username],
+        "unknown": ["unknown"],
+    }
+
+    username = decode_jwt(get_access_token.split()[1])["username"]
+    response = db_client.get(f"/users/{username}/following", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["items"] == sorted([followed.username, new.username])
+    assert response.json()["count"] == 2
+    response = db_client.get(f"/users/{new.username}/followers", headers=headers)
+    assert response.json()["items"] == [username]
+
+
+@pytest.mark.asyncio
+async def test_follow_users_in_bulk_requires_usernames(db_client, get_access_token):
+    response = db_client.post(
+        "/followers/bulk",
+        json={"usernames": []},
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_get_following_pages(db_client, get_access_token, user_factory):
+    users = user_factory.create_batch(3)
+    await session.commit()
+    headers = {"Authorization": get_access_token}
+    db_client.post(
+        "/followers/bulk",
+        json={"usernames": [user.username for user in users]},
+        headers=headers,
+    )
+    username = decode_jwt(get_access_token.split()[1])["username"]
+
+    names, cursor = [], None
+    while True:
+        url = f"/users/{username}/following?limit=2"
+        response = db_client.get(
+            url + (f"&cursor={cursor}" if cursor else ""), headers=headers
+        )
+        assert response.status_code == 200
+        names.extend(response.json()["items"])
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+    assert names == sorted(user.username for user in users)
+    response = db_client.get(
+        f"/users/{username}/following?cursor=invalid", headers=headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("kind", ("followers", "following"))
+@pytest.mark.asyncio
+async def test_get_follow_lists_of_unknown_user(
+    db_client, get_access_token, user_factory, kind
+):
+    user = user_factory.create()
+    await session.commit()
+    headers = {"Authorization": get_access_token}
+    response = db_client.get(f"/users/{user.username}/{kind}", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None, "count": 0}
+    response = db_client.get(f"/users/unknown/{kind}", headers=headers)
+    assert response.status_code == 404
+    assert response.json() == {"detail": "User does not exist."}
+
+
+@pytest.mark.asyncio
+async def test_iter_follower_emails_in_chunks(db_client, user_factory):
+    author, *followers = user_factory.create_batch(4)
+    followed = user_factory.create()
+    await session.commit()
+    rows = [{"user_id": user.id, "following_id": author.id} for user in followers]
+    # The accounts the author follows are not the followers
+    rows.append({"user_id": author.id, "following_id": followed.id})
+    await session.execute(insert(user_following).values(rows))
+    await session.commit()
+    repository = SQLAlchemyFollowerRepository(session)
+    chunks = [chunk async for chunk in repository.iter_follower_emails(author.id, 2)]
+    assert chunks == [
+        [followers[0].email, followers[1].email],
+        [followers[2].email],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_followed_user_is_no_longer_suggested(
+    db_client, get_access_token, user_factory
+):
+    followed, suggested = user_factory.create_batch(2)
+    await session.commit()
+    headers = {"Authorization": get_access_token}
+    user_id = int(decode_jwt(get_access_token.split()[1])["sub"])
+    redis = aioredis.from_url(f"redis://{settings.redis.redis_host}")
+    await redis.zadd(
+        f"suggestions:users:{user_id}", {followed.username: 2, suggested.username: 1}
+    )
+    response = db_client.post(f"/followers/{followed.username}", headers=headers)
+    assert response.status_code == 201
+    response = db_client.get("/users/me/suggestions", headers=headers)
+    assert response.json() == [{"username": suggested.username, "mutual": 1}]
+    await redis.delete(f"suggestions:users:{user_id}")
+    await redis.close()
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.getcwd())
+from auth.pool import BoundedThreadPool, PoolOverloadedError
+
+
+@pytest.mark.asyncio
+async def test_pool_runs_blocking_calls():
+    pool = BoundedThreadPool("test_run", 2, 0)
+    assert await pool.run(sum, [1, 2, 3]) == 6
+    assert pool.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_calls_when_full():
+    pool = BoundedThreadPool("test_full", 1, 1)
+    release = threading.Event()
+    running = asyncio.gather(pool.run(release.wait), pool.run(release.wait))
+    await asyncio.sleep(0)
+    with pytest.raises(PoolOverloadedError):
+        await pool.run(release.wait)
+    release.set()
+    assert await running == [True, True]
+    await asyncio.sleep(0)
+    assert pool.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_keeps_the_place_of_a_cancelled_call():
+    pool = BoundedThreadPool("test_cancel", 1, 0)
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        return release.wait()
+
+    call = asyncio.ensure_future(pool.run(work))
+    # A call cancelled before its thread starts gives its place back at once
+    await asyncio.to_thread(started.wait, 5)
+    call.cancel()
+    await asyncio.sleep(0)
+    # The thread still runs, so the pool is still full
+    assert pool.pending == 1
+    with pytest.raises(PoolOverloadedError):
+        await pool.run(release.wait)
+    release.set()
+    for _ in range(100):
+        if not pool.pending:
+            break
+        await asyncio.sleep(0.01)
+    assert pool.pending == 0
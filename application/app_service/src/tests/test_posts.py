@@ -1,10 +1,17 @@
+import json
 import os
 import sys
+from datetime import datetime, timedelta
 
+import aioredis
 import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 sys.path.append(os.getcwd())
-from tests.factories.factory_boy import session
+from env_config import settings
+from repositories.posts import SQLAlchemyPostRepository
+from tests.factories.factory_boy import engine, session
+from utils.etag import CollectionVersion
 
 
 @pytest.mark.asyncio
@@ -20,9 +27,50 @@ async def test_get_posts_status_code_200_and_check_response_content(
     await session.commit()
     response = db_client.get("/posts", headers={"Authorization": get_access_token})
     assert response.status_code == 200
-    assert len(response.json()) == 2
-    assert response.json()[0]["name"] == "Post0"
-    assert response.json()[1]["name"] == "Post1"
+    assert len(response.json()["items"]) == 2
+    assert response.json()["items"][0]["name"] == "Post1"
+    assert response.json()["items"][1]["name"] == "Post0"
+    assert response.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_posts_keyset_pagination(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post_factory.create_batch(3, author_id=user.id)
+    await session.commit()
+    response = db_client.get(
+        "/posts/?limit=2", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page["items"]) == 2
+    assert first_page["next_cursor"] is not None
+
+    response = db_client.get(
+        f"/posts/?limit=2&cursor={first_page['next_cursor']}",
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 200
+    second_page = response.json()
+    assert len(second_page["items"]) == 1
+    assert second_page["next_cursor"] is None
+    assert second_page["items"][0]["id"] not in [
+        post["id"] for post in first_page["items"]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_posts_invalid_cursor(db_client, get_access_token):
+    response = db_client.get(
+        "/posts/?cursor=invalid", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 400
 
 
 @pytest.mark.asyncio
@@ -42,7 +90,96 @@ async def test_get_posts_status_filtering_status(
         headers={"Authorization": get_access_token},
     )
     assert response.status_code == 200
-    assert response.json()[0]["status"] == post.status.lower()
+    assert response.json()["items"][0]["status"] == post.status.lower()
+
+
+@pytest.mark.asyncio
+async def test_get_posts_sparse_fields(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post_factory.create(author_id=user.id)
+    await session.commit()
+    response = db_client.get(
+        "/posts/?fields=name,excerpt", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    assert set(response.json()["items"][0]) == {"id", "name", "excerpt"}
+
+
+@pytest.mark.asyncio
+async def test_get_posts_unknown_fields(db_client, get_access_token):
+    response = db_client.get(
+        "/posts/?fields=name,password", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_posts_conditional_get(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post_factory.create_batch(2, author_id=user.id)
+    await session.commit()
+    response = db_client.get("/posts", headers={"Authorization": get_access_token})
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = db_client.get(
+        "/posts",
+        headers={"Authorization": get_access_token, "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    response = db_client.get(
+        "/posts/?limit=1",
+        headers={"Authorization": get_access_token, "If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_get_post_conditional_get(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post = post_factory.create(author_id=user.id)
+    await session.commit()
+    response = db_client.get(
+        f"/posts/{post.id}", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = db_client.get(
+        f"/posts/{post.id}",
+        headers={"Authorization": get_access_token, "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_get_post_conditional_get_of_missing_post(db_client, get_access_token):
+    response = db_client.get(
+        "/posts/100000",
+        headers={"Authorization": get_access_token, "If-None-Match": "*"},
+    )
+    assert response.status_code == 404
 
 
 @pytest.mark.asyncio
@@ -71,3 +208,315 @@ async def test_create_post_status_201_and_check_response(
         headers={"Authorization": get_access_token},
     )
     assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_create_posts_bulk_status_201_and_check_response(
+    db_client,
+    user_factory,
+    get_access_token,
+):
+    user = user_factory.create()
+    await session.commit()
+    data = {
+        "posts": [
+            {
+                "name": f"name{number}",
+                "content": "content",
+                "excerpt": "excerpt",
+                "author_id": user.id,
+            }
+            for number in range(3)
+        ]
+    }
+    response = db_client.post(
+        "/posts/bulk",
+        json=data,
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 201
+    assert len(response.json()["post_ids"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_get_post_comments_ordered_by_karma(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+    comment_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post = post_factory.create(author_id=user.id)
+    await session.commit()
+    for karma in (5, 1, 3):
+        comment_factory.create(karma=karma, author_id=user.id, post_id=post.id)
+    await session.commit()
+    response = db_client.get(
+        f"/posts/{post.id}/comments?order=karma&limit=2",
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [comment["karma"] for comment in first_page["items"]] == [5, 3]
+
+    response = db_client.get(
+        f"/posts/{post.id}/comments?order=karma&limit=2"
+        f"&cursor={first_page['next_cursor']}",
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 200
+    assert [comment["karma"] for comment in response.json()["items"]] == [1]
+    assert response.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_posts_with_comments(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+    comment_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post = post_factory.create(author_id=user.id, status="PUBLISHED")
+    await session.commit()
+    for karma in (1, 7, 4):
+        comment_factory.create(karma=karma, author_id=user.id, post_id=post.id)
+    await session.commit()
+    response = db_client.get(
+        "/posts/?with_comments=2", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [comment["karma"] for comment in items[0]["comments"]] == [7, 4]
+
+
+@pytest.mark.asyncio
+async def test_export_posts_with_images(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+    image_factory,
+    monkeypatch,
+):
+    # The export opens its own session, so it has to read the test database
+    monkeypatch.setattr(
+        "services.posts.async_session",
+        async_sessionmaker(engine, expire_on_commit=False),
+    )
+    user = user_factory.create()
+    await session.commit()
+    posts = post_factory.create_batch(2, author_id=user.id)
+    await session.commit()
+    image = image_factory.create(post_id=posts[0].id)
+    await session.commit()
+    response = db_client.get(
+        "/posts/export", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["id"] for line in lines) == sorted(post.id for post in posts)
+    images = {line["id"]: line["images"] for line in lines}
+    assert images[posts[0].id] == [{"image": image.image}]
+    assert images[posts[1].id] == []
+
+
+@pytest.mark.asyncio
+async def test_search_posts_ranks_and_pages(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    in_content = post_factory.create(
+        author_id=user.id,
+        status="PUBLISHED",
+        name="Weekly notes",
+        content="A few words about gardening",
+    )
+    in_name = post_factory.create(
+        author_id=user.id, status="PUBLISHED", name="Gardening in spring"
+    )
+    post_factory.create(author_id=user.id, status="PUBLISHED", name="Cooking")
+    await session.commit()
+    response = db_client.get(
+        "/posts/search?q=gardening&limit=1",
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [post["id"] for post in first_page["items"]] == [in_name.id]
+
+    response = db_client.get(
+        f"/posts/search?q=gardening&limit=1&cursor={first_page['next_cursor']}",
+        headers={"Authorization": get_access_token},
+    )
+    assert [post["id"] for post in response.json()["items"]] == [in_content.id]
+    assert response.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_search_posts_requires_query(db_client, get_access_token):
+    response = db_client.get(
+        "/posts/search", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_change_post_returns_the_updated_post(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post = post_factory.create(author_id=user.id)
+    await session.commit()
+    response = db_client.patch(
+        f"/posts/{post.id}",
+        json={"name": "renamed"},
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 200
+    assert response.json()["name"] == "renamed"
+    assert response.json()["content"] == post.content
+
+    response = db_client.patch(
+        "/posts/100000",
+        json={"name": "renamed"},
+        headers={"Authorization": get_access_token},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_delete_post_with_images(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+    image_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post = post_factory.create(author_id=user.id)
+    await session.commit()
+    image_factory.create(post_id=post.id)
+    await session.commit()
+    response = db_client.delete(
+        f"/posts/{post.id}", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"result": True}
+
+    response = db_client.delete(
+        f"/posts/{post.id}", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_delete_post_with_comments(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+    comment_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post = post_factory.create(author_id=user.id)
+    await session.commit()
+    comment_factory.create_batch(2, author_id=user.id, post_id=post.id)
+    await session.commit()
+    response = db_client.delete(
+        f"/posts/{post.id}", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"result": True}
+    response = db_client.get(
+        f"/posts/{post.id}/comments", headers={"Authorization": get_access_token}
+    )
+    assert response.json()["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_delete_post_forgets_its_views(
+    db_client,
+    get_access_token,
+    post_factory,
+    user_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    post = post_factory.create(author_id=user.id, status="PUBLISHED")
+    await session.commit()
+    response = db_client.get(
+        f"/posts/{post.id}", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    response = db_client.delete(
+        f"/posts/{post.id}", headers={"Authorization": get_access_token}
+    )
+    assert response.status_code == 200
+    redis = aioredis.from_url(f"redis://{settings.redis.redis_host}")
+    assert not await redis.exists(f"views:posts:{post.id}")
+    assert not await redis.sismember("views:posts:dirty", post.id)
+    await redis.close()
+
+
+@pytest.mark.asyncio
+async def test_purge_trash_deletes_only_old_trashed_posts(
+    db_client,
+    user_factory,
+    post_factory,
+    comment_factory,
+    image_factory,
+):
+    user = user_factory.create()
+    await session.commit()
+    old = datetime.now() - timedelta(days=40)
+    doomed = post_factory.create(author_id=user.id, status="TRASH", modified=old)
+    recent = post_factory.create(author_id=user.id, status="TRASH")
+    published = post_factory.create(author_id=user.id, status="PUBLISHED", modified=old)
+    await session.commit()
+    image_factory.create(post_id=doomed.id)
+    comment = comment_factory.create(author_id=user.id, post_id=doomed.id)
+    comment_factory.create(author_id=user.id, post_id=published.id)
+    await session.commit()
+    repository = SQLAlchemyPostRepository(session)
+    assert await repository.purge_trash(timedelta(days=30), 10) == (
+        [doomed.id],
+        1,
+        [comment.id],
+    )
+    await session.commit()
+    assert await repository.purge_trash(timedelta(days=30), 10) == ([], 0, [])
+    await session.commit()
+    assert await repository.get_post(doomed.id) is None
+    assert await repository.get_post(recent.id) is not None
+    assert await repository.get_post(published.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_collection_version_modified_increases_with_every_bump():
+    redis = aioredis.from_url(f"redis://{settings.redis.redis_host}")
+    collection = CollectionVersion(redis, "tests")
+    await redis.delete(collection.key)
+    await collection.bump()
+    first_version, first_modified = await collection.get()
+    await collection.bump()
+    second_version, second_modified = await collection.get()
+    assert second_version == first_version + 1
+    # Both bumps are within a second, the second one is still a later change
+    assert second_modified > first_modified
+    await redis.delete(collection.key)
+    await redis.close()
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import sys
+
+import aioredis
+import pytest
+import pytest_asyncio
+
+sys.path.append(os.getcwd())
+from env_config import settings
+from schemas.users import PrincipalSchema
+from utils.principals import PrincipalCache
+
+
+class Loader:
+    def __init__(self, *usernames: str) -> None:
+        self.usernames = usernames
+        self.calls = 0
+
+    async def __call__(self, username: str) -> PrincipalSchema | None:
+        self.calls += 1
+        if username not in self.usernames:
+            return None
+        return PrincipalSchema(id=1, username=username, email=f"{username}@mail.com")
+
+
+@pytest_asyncio.fixture
+async def redis_cli():
+    redis = aioredis.from_url(f"redis://{settings.redis.redis_host}")
+    yield redis
+    keys = await redis.keys("principals:test-*")
+    if keys:
+        await redis.delete(*keys)
+    await redis.close()
+
+
+@pytest.mark.asyncio
+async def test_principal_is_loaded_once(redis_cli):
+    cache = PrincipalCache(redis_cli, 10, 60, 60)
+    load = Loader("test-first")
+    first = await cache.get("test-first", load)
+    second = await cache.get("test-first", load)
+    assert first == second
+    assert first.username == "test-first"
+    assert load.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_principal_is_read_from_redis(redis_cli):
+    cache = PrincipalCache(redis_cli, 10, 0, 60)
+    load = Loader("test-expired")
+    await cache.get("test-expired", load)
+    principal = await cache.get("test-expired", load)
+    assert principal.username == "test-expired"
+    assert load.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_principal_is_not_cached(redis_cli):
+    cache = PrincipalCache(redis_cli, 10, 60, 60)
+    load = Loader()
+    assert await cache.get("test-missing", load) is None
+    assert await cache.get("test-missing", load) is None
+    assert load.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_principal_is_evicted(redis_cli):
+    cache = PrincipalCache(redis_cli, 2, 60, 60)
+    load = Loader("test-a", "test-b", "test-c")
+    for username in ("test-a", "test-b", "test-a", "test-c"):
+        await cache.get(username, load)
+    assert list(cache.local) == ["test-a", "test-c"]
+
+
+@pytest.mark.asyncio
+async def test_invalidated_principal_is_loaded_again(redis_cli):
+    cache = PrincipalCache(redis_cli, 10, 60, 60)
+    load = Loader("test-changed")
+    await cache.get("test-changed", load)
+    await cache.invalidate("test-changed")
+    assert await redis_cli.get("principals:test-changed") is None
+    await cache.get("test-changed", load)
+    assert load.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_processes(redis_cli):
+    cache = PrincipalCache(redis_cli, 10, 60, 60)
+    other = PrincipalCache(
+        aioredis.from_url(f"redis://{settings.redis.redis_host}"), 10, 60, 60
+    )
+    listener = asyncio.create_task(other.listen())
+    await asyncio.sleep(0.2)
+    await other.get("test-shared", Loader("test-shared"))
+    assert "test-shared" in other.local
+
+    await cache.invalidate("test-shared")
+    for _ in range(50):
+        if "test-shared" not in other.local:
+            break
+        await asyncio.sleep(0.02)
+    listener.cancel()
+    await other.redis.close()
+    assert "test-shared" not in other.local
@@ -0,0 +1,72 @@
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.getcwd())
+from utils.trending import (
+    add_comment_scores,
+    top_scores,
+    trending_scores,
+    view_scores,
+)
+
+HALF_LIFE = 3600.0
+
+
+def score(posts, comments, size=10):
+    return trending_scores(
+        np.array(posts, dtype=float).reshape(-1, 3),
+        np.array(comments, dtype=float).reshape(-1, 3),
+        HALF_LIFE,
+        karma_weight=0.5,
+        view_weight=1.0,
+        size=size,
+    )
+
+
+def test_trending_scores_without_posts():
+    assert score([], [[1, 0, 0]]) == {}
+
+
+def test_trending_scores_of_views_halve_every_half_life():
+    scores = score([[1, 0, 99], [2, HALF_LIFE, 99]], [])
+    assert scores[1] == pytest.approx(math.log(100))
+    assert scores[2] == pytest.approx(scores[1] / 2)
+
+
+def test_trending_scores_of_comments_grow_with_karma():
+    scores = score(
+        [[1, 0, 0], [2, 0, 0], [3, 0, 0]],
+        [[1, 0, 0], [2, 0, 10], [2, 0, 0], [3, 0, -5]],
+    )
+    assert scores[1] == pytest.approx(1)
+    assert scores[2] == pytest.approx(2 + 0.5 * math.log(11))
+    # Negative karma does not take away from a comment
+    assert scores[3] == pytest.approx(1)
+
+
+def test_trending_scores_skip_comments_of_unknown_posts():
+    scores = score([[2, 0, 0], [5, 0, 0]], [[1, 0, 0], [3, 0, 0], [9, 0, 0]])
+    assert scores == {2: 0, 5: 0}
+
+
+def test_trending_scores_keep_the_best_posts():
+    posts = [[idd, 0, idd] for idd in range(1, 21)]
+    scores = score(posts, [], size=3)
+    assert sorted(scores) == [18, 19, 20]
+
+
+def test_trending_scores_folded_chunk_by_chunk():
+    posts = np.array([[3, 10, 5], [1, 0, 0], [2, 600, 40]], dtype=float)
+    comments = np.array(
+        [[1, 0, 3], [2, 60, 0], [3, 5, 1], [1, 30, -2], [7, 0, 9]], dtype=float
+    )
+    ids, scores = view_scores(posts, HALF_LIFE, view_weight=1.0)
+    for chunk in np.array_split(comments, 3):
+        add_comment_scores(ids, scores, chunk, HALF_LIFE, karma_weight=0.5)
+    assert top_scores(ids, scores, 2) == pytest.approx(
+        trending_scores(posts, comments, HALF_LIFE, 0.5, 1.0, 2)
+    )
@@ -4,6 +4,7 @@ import sys
 import pytest
 
 sys.path.append(os.getcwd())
+from auth.pool import PASSWORD_POOL
 from tests.factories.factory_boy import session
 
 
@@ -123,3 +124,29 @@ async def test_user_refresh_token_not_authenticated_and_forbidden(
 ):
     response = db_client.get("/auth/refresh", headers=auth)
     assert response.status_code == status_code
+
+
+@pytest.mark.asyncio
+async def test_user_register_and_login_status_code_503_when_pool_is_full(
+    db_client, user_factory, monkeypatch
+):
+    user = user_factory.create()
+    await session.commit()
+    monkeypatch.setattr(PASSWORD_POOL, "pending", PASSWORD_POOL.capacity)
+    dct_user = {
+        "username": "username",
+        "password": "password",
+        "email": "user@gmail.com",
+    }
+    response = db_client.post("/auth/register", json=dct_user)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    dct_user = {
+        "username": user.username,
+        "password": "password",
+        "email": user.email,
+    }
+    response = db_client.post("/auth/login", json=dct_user)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
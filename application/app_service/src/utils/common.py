@@ -28,3 +28,8 @@ class TypePost(enum.Enum):
 class TypeComment(enum.Enum):
     TEXTUAL = "textual"
     CONCEPTUAL = "conceptual"
+
+
+class CommentOrder(enum.Enum):
+    DATE = "date"
+    KARMA = "karma"
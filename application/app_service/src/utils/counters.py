@@ -0,0 +1,104 @@
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable
+
+from aioredis import Redis
+
+from db.redis_config import redis
+
+LOCK_TIMEOUT: int = 60
+LOCK_POLL_INTERVAL: float = 0.1
+
+# Releases a lock only if it is still held with the token of its owner, a lock
+# that expired and was taken by another worker is left to that worker
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisCounterBuffer:
+    """
+    A class that buffers counter deltas in a redis hash, so that hot rows are
+    not updated on every request but flushed to the database in batches
+    """
+
+    def __init__(self, redis_cli: Redis, key: str) -> None:
+        self.redis = redis_cli
+        self.key = key
+        self.flushing_key = f"{key}:flushing"
+        self.lock_key = f"{key}:lock"
+        self.release_script = redis_cli.register_script(RELEASE_SCRIPT)
+
+    async def incr(self, idd: int, amount: int = 1) -> None:
+        """The method of buffering a delta of a counter"""
+        await self.redis.hincrby(self.key, idd, amount)
+
+    async def forget(self, ids: Iterable[int]) -> None:
+        """The method of dropping the deltas of deleted objects"""
+        ids = list(ids)
+        if not ids:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hdel(self.key, *ids)
+            pipe.hdel(self.flushing_key, *ids)
+            await pipe.execute()
+
+    async def pending(self, ids: Iterable[int]) -> dict[int, int]:
+        """The method of getting the deltas that are not flushed yet"""
+        ids = list(ids)
+        if not ids:
+            return {}
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hmget(self.key, ids)
+            pipe.hmget(self.flushing_key, ids)
+            buffered, flushing = await pipe.execute()
+        return {
+            idd: int(first or 0) + int(second or 0)
+            for idd, first, second in zip(ids, buffered, flushing)
+        }
+
+    @asynccontextmanager
+    async def lock(self, wait: bool = False) -> AsyncIterator[bool]:
+        """
+        The method of taking the flush lock of the buffer, yields False when
+        the lock is taken by someone else and wait is not set. The lock holds
+        a random token, so only its owner releases it
+        """
+        token = secrets.token_hex(16)
+        while not await self.redis.set(self.lock_key, token, nx=True, ex=LOCK_TIMEOUT):
+            if not wait:
+                yield False
+                return
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield True
+        finally:
+            await self.release_script(keys=[self.lock_key], args=[token])
+
+    @asynccontextmanager
+    async def flush(self) -> AsyncIterator[dict[int, int]]:
+        """
+        The method of taking the buffered deltas. They are moved aside atomically
+        and removed only when the block succeeds, otherwise the next flush
+        retries them. Only one worker flushes a buffer at a time
+        """
+        async with self.lock() as locked:
+            if not locked:
+                yield {}
+                return
+            # A leftover of a failed flush is retried before new deltas are taken
+            leftover = await self.redis.exists(self.flushing_key)
+            if not leftover and await self.redis.exists(self.key):
+                await self.redis.rename(self.key, self.flushing_key)
+            deltas = await self.redis.hgetall(self.flushing_key)
+            yield {int(idd): int(delta) for idd, delta in deltas.items() if int(delta)}
+            await self.redis.delete(self.flushing_key)
+
+
+POST_COMMENTS_COUNTER = RedisCounterBuffer(redis, "counters:posts:comment_count")
+COMMENT_REPLIES_COUNTER = RedisCounterBuffer(redis, "counters:comments:comment_count")
+COMMENT_KARMA_COUNTER = RedisCounterBuffer(redis, "counters:comments:karma")
@@ -0,0 +1,90 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from aioredis import Redis
+from fastapi import Request, Response
+from starlette import status
+
+from db.redis_config import redis
+
+# Bumps the version and moves the time of the last change forward by at least
+# a second, so a write within the second of a response is never hidden from
+# If-Modified-Since
+BUMP_SCRIPT = """
+local previous = tonumber(redis.call('HGET', KEYS[1], 'modified') or '0')
+local modified = math.max(tonumber(ARGV[1]), previous + 1)
+redis.call('HINCRBY', KEYS[1], 'version', 1)
+redis.call('HSET', KEYS[1], 'modified', modified)
+return modified
+"""
+
+
+class CollectionVersion:
+    """
+    A class that keeps a version counter of a collection in redis, the version
+    changes whenever any object of the collection is written
+    """
+
+    def __init__(self, redis_cli: Redis, name: str) -> None:
+        self.redis = redis_cli
+        self.key = f"version:{name}"
+        self.script = redis_cli.register_script(BUMP_SCRIPT)
+
+    async def bump(self) -> None:
+        """
+        The method of marking the collection as changed, the time of the last
+        change strictly increases with every bump
+        """
+        await self.script(keys=[self.key], args=[int(time.time())])
+
+    async def get(self) -> tuple[int, int]:
+        """The method of getting the version and the time of the last change"""
+        version, modified = await self.redis.hmget(self.key, "version", "modified")
+        return int(version or 0), int(modified or 0)
+
+
+def make_etag(*parts) -> str:
+    """Building a strong ETag from the parts that identify a representation"""
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str, modified: int) -> bool:
+    """
+    Checking the conditional headers of a request, If-None-Match takes
+    precedence over If-Modified-Since
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return modified <= since.timestamp()
+    return False
+
+
+def cache_headers(etag: str, modified: int) -> dict[str, str]:
+    """Building the validator headers of a response"""
+    headers = {"ETag": etag}
+    if modified:
+        last_modified = datetime.fromtimestamp(modified, tz=timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def not_modified(etag: str, modified: int) -> Response:
+    """Building an empty 304 response"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, modified)
+    )
+
+
+POSTS_VERSION = CollectionVersion(redis, "posts")
+COMMENTS_VERSION = CollectionVersion(redis, "comments")
@@ -0,0 +1,99 @@
+from aioredis import Redis
+
+from db.redis_config import redis
+from utils.pagination import decode_cursor, encode_cursor
+
+FOLLOWERS: str = "followers"
+FOLLOWING: str = "following"
+
+
+def decode_username_cursor(cursor: str) -> str:
+    """Unpacking a (username,) cursor"""
+    keys = decode_cursor(cursor)
+    if len(keys) != 1 or not isinstance(keys[0], str):
+        raise ValueError("Invalid cursor.")
+    return keys[0]
+
+
+class RedisFollowLists:
+    """
+    A class that keeps the followers and the following of every user in redis
+    sorted sets of usernames. All scores are 0, so a set is ordered by username
+    and a page is a ZRANGEBYLEX range, the size of a set is ZCARD in O(1)
+    """
+
+    def __init__(self, redis_cli: Redis) -> None:
+        self.redis = redis_cli
+
+    def _key(self, kind: str, username: str) -> str:
+        return f"{kind}:{username}"
+
+    async def add(self, username: str, followed: list[str]) -> None:
+        """The method of recording that a user follows other users"""
+        if not followed:
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self._key(FOLLOWING, username), dict.fromkeys(followed, 0))
+            for name in followed:
+                pipe.zadd(self._key(FOLLOWERS, name), {username: 0})
+            await pipe.execute()
+
+    async def remove(self, username: str, unfollowed: str) -> None:
+        """The method of recording that a user unfollowed another user"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._key(FOLLOWING, username), unfollowed)
+            pipe.zrem(self._key(FOLLOWERS, unfollowed), username)
+            await pipe.execute()
+
+    async def page(
+        self, kind: str, username: str, cursor: str | None, limit: int
+    ) -> dict:
+        """
+        The method of getting a page of the followers or of the following
+        of a user together with their total number
+        """
+        start = f"({decode_username_cursor(cursor)}" if cursor else "-"
+        key = self._key(kind, username)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrangebylex(key, start, "+", start=0, num=limit + 1)
+            pipe.zcard(key)
+            names, count = await pipe.execute()
+        names = [name.decode() if isinstance(name, bytes) else name for name in names]
+        next_cursor = encode_cursor(names[limit - 1]) if len(names) > limit else None
+        return {"items": names[:limit], "next_cursor": next_cursor, "count": count}
+
+    async def replace(
+        self,
+        usernames: list[str],
+        followers: dict[str, list[str]],
+        following: dict[str, list[str]],
+    ) -> None:
+        """
+        The method of replacing the sets of a batch of users. The sets are built
+        under temporary keys and swapped in with RENAME in one transaction, so
+        the live sets are changed only for the moment of the swap
+        """
+        sets = [
+            (self._key(kind, username), names)
+            for username in usernames
+            for kind, names in (
+                (FOLLOWERS, followers.get(username)),
+                (FOLLOWING, following.get(username)),
+            )
+        ]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, names in sets:
+                pipe.delete(f"{key}:rebuilding")
+                if names:
+                    pipe.zadd(f"{key}:rebuilding", dict.fromkeys(names, 0))
+            await pipe.execute()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for key, names in sets:
+                if names:
+                    pipe.rename(f"{key}:rebuilding", key)
+                else:
+                    pipe.delete(key)
+            await pipe.execute()
+
+
+FOLLOW_LISTS = RedisFollowLists(redis)
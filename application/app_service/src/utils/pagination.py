@@ -0,0 +1,70 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+from sqlalchemy import ColumnElement, tuple_
+
+DEFAULT_PAGE_SIZE: int = 20
+MAX_PAGE_SIZE: int = 100
+MAX_EMBEDDED_COMMENTS: int = 10
+
+
+def encode_cursor(*keys: Any) -> str:
+    """Packing the sort keys of the last row of a page into an opaque cursor"""
+    raw = json.dumps(
+        [key.isoformat() if isinstance(key, datetime) else key for key in keys]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """Unpacking an opaque cursor, raises ValueError if it is malformed"""
+    try:
+        keys = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+    if not isinstance(keys, list):
+        raise ValueError("Invalid cursor.")
+    return keys
+
+
+def decode_date_cursor(cursor: str) -> tuple[datetime, int]:
+    """Unpacking a (date, id) cursor"""
+    keys = decode_cursor(cursor)
+    try:
+        date, idd = keys
+        return datetime.fromisoformat(date), int(idd)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+
+
+def decode_int_cursor(cursor: str) -> tuple[int, int]:
+    """Unpacking an (integer, id) cursor"""
+    keys = decode_cursor(cursor)
+    try:
+        value, idd = keys
+        return int(value), int(idd)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+
+
+def keyset_before(
+    columns: Sequence[ColumnElement], keys: Sequence[Any]
+) -> ColumnElement[bool]:
+    """
+    Row value comparison that continues a descending keyset scan,
+    so that the next page is a bounded range of the composite index
+    """
+    return tuple_(*columns) < tuple_(*keys)
+
+
+def make_page(rows: Sequence[Any], limit: int, cursor_of: Callable[[Any], str]) -> dict:
+    """
+    Cutting the extra row that was requested to find out
+    whether there is a next page and building the page
+    """
+    items = list(rows[:limit])
+    next_cursor = cursor_of(items[-1]) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from aioredis import Redis
+
+from db.redis_config import redis
+from env_config import settings
+from log_config import add_logger
+from schemas.users import PrincipalSchema
+
+logger = add_logger(__name__)
+
+INVALIDATE_CHANNEL: str = "principals:invalidate"
+RESUBSCRIBE_PAUSE: float = 1.0
+
+
+class PrincipalCache:
+    """
+    A class that caches the authenticated principals (id, username and email)
+    in a bounded in-process LRU with a short TTL in front of redis, so that
+    authenticated requests do not query the database. Changes of a user are
+    published to every process, which drops its local entry
+    """
+
+    def __init__(
+        self, redis_cli: Redis, max_size: int, local_ttl: int, ttl: int
+    ) -> None:
+        self.redis = redis_cli
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self.local: OrderedDict[str, tuple[float, PrincipalSchema]] = OrderedDict()
+
+    def _key(self, username: str) -> str:
+        return f"principals:{username}"
+
+    def _get_local(self, username: str) -> PrincipalSchema | None:
+        entry = self.local.get(username)
+        if entry is None:
+            return None
+        expires, principal = entry
+        if expires < time.monotonic():
+            del self.local[username]
+            return None
+        self.local.move_to_end(username)
+        return principal
+
+    def _put_local(self, principal: PrincipalSchema) -> None:
+        self.local[principal.username] = (
+            time.monotonic() + self.local_ttl,
+            principal,
+        )
+        self.local.move_to_end(principal.username)
+        while len(self.local) > self.max_size:
+            self.local.popitem(last=False)
+
+    async def get(
+        self,
+        username: str,
+        load: Callable[[str], Awaitable[PrincipalSchema | None]],
+    ) -> PrincipalSchema | None:
+        """
+        The method of getting a principal from the process, then from redis
+        and only then from the database by the load callable
+        """
+        principal = self._get_local(username)
+        if principal is not None:
+            return principal
+        cached = await self.redis.get(self._key(username))
+        if cached is not None:
+            principal = PrincipalSchema.model_validate_json(cached)
+        else:
+            principal = await load(username)
+            if principal is None:
+                return None
+            await self.redis.set(
+                self._key(username), principal.model_dump_json(), ex=self.ttl
+            )
+        self._put_local(principal)
+        return principal
+
+    async def invalidate(self, username: str) -> None:
+        """The method of dropping a principal in redis and in every process"""
+        self.local.pop(username, None)
+        await self.redis.delete(self._key(username))
+        await self.redis.publish(INVALIDATE_CHANNEL, username)
+
+    async def listen(self) -> None:
+        """
+        The method of dropping the local entries of the changed users, it runs
+        for the lifetime of the process and subscribes again after a failure
+        """
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(INVALIDATE_CHANNEL)
+                # Invalidations published while not subscribed were missed
+                self.local.clear()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    username = message["data"]
+                    if isinstance(username, bytes):
+                        username = username.decode()
+                    self.local.pop(username, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Principal invalidations were interrupted %s", exc)
+                self.local.clear()
+                await asyncio.sleep(RESUBSCRIBE_PAUSE)
+
+
+PRINCIPALS = PrincipalCache(
+    redis,
+    settings.auth_jwt.principal_cache_size,
+    settings.auth_jwt.principal_local_ttl,
+    settings.auth_jwt.principal_ttl,
+)
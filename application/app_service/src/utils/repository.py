@@ -1,16 +1,27 @@
 from abc import ABC, abstractmethod
-from collections.abc import Sequence
-from typing import TypeVar, Generic, Type
+from collections.abc import Sequence, AsyncIterator
+from datetime import timedelta
+from typing import TypeVar, Generic, Type, Any
 
 from pydantic import BaseModel
-from sqlalchemy import insert, select
+from sqlalchemy import (
+    Integer,
+    RowMapping,
+    column,
+    delete,
+    insert,
+    select,
+    update,
+    values,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.images import Image
 from models.comments import Comment
 from models.posts import Post
 from models.users import User
-from utils.specification import Specification
+from utils.common import CommentOrder
+from utils.specification import Specification, SearchSpecification
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -22,6 +33,10 @@ class BaseRepository(Generic[T], ABC):
     async def add(self, data: dict) -> int:
         raise NotImplementedError()
 
+    @abstractmethod
+    async def add_many(self, data: list[dict]) -> list[int]:
+        raise NotImplementedError()
+
     @abstractmethod
     async def get(self, name: str) -> T | None:
         raise NotImplementedError()
@@ -38,6 +53,14 @@ class BaseRepository(Generic[T], ABC):
     async def delete(self, idd: int) -> bool | None:
         raise NotImplementedError()
 
+    @abstractmethod
+    async def increment_column(self, name: str, deltas: dict[int, int]) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def set_column(self, name: str, data: dict[int, Any]) -> None:
+        raise NotImplementedError()
+
 
 class SQLAlchemyBaseRepository(BaseRepository[T], ABC):
     """An abstract repository class using SQLAlchemy"""
@@ -52,6 +75,12 @@ class SQLAlchemyBaseRepository(BaseRepository[T], ABC):
         result = await self._session.execute(stmt)
         return result.scalar_one()
 
+    async def add_many(self, data: list[dict]) -> list[int]:
+        """Method of adding a batch of objects with one multi-row INSERT"""
+        stmt = insert(self._model).values(data).returning(self._model.id)
+        result = await self._session.execute(stmt)
+        return list(result.scalars().all())
+
     async def list(self, specification: Specification) -> Sequence[T]:
         """Method of getting objects"""
         stmt = select(self._model).where(specification.is_satisfied())  # type: ignore
@@ -67,20 +96,73 @@ class SQLAlchemyBaseRepository(BaseRepository[T], ABC):
         return result
 
     async def update(self, idd: int, data: dict) -> T | None:
-        """Method of updating an object"""
-        obj = await self._session.get(self._model, ident=idd)
-        if obj:
-            for key, value in data.items():
-                setattr(obj, key, value)
-            return obj
+        """
+        Method of updating an object with one UPDATE ... RETURNING,
+        returns None if there is no such object
+        """
+        if not data:
+            return await self._session.get(self._model, ident=idd)
+        stmt = (
+            update(self._model)
+            .where(self._model.id == idd)  # type: ignore
+            .values(**data)
+            .returning(self._model)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none()
 
     async def delete(self, idd: int) -> bool | None:
-        """Method of removing an object"""
-        obj = await self._session.get(self._model, ident=idd)
-        if obj:
-            await self._session.delete(obj)
+        """
+        Method of removing an object with one DELETE ... RETURNING,
+        returns None if there is no such object
+        """
+        stmt = (
+            delete(self._model)
+            .where(self._model.id == idd)  # type: ignore
+            .returning(self._model.id)
+        )
+        result = await self._session.execute(stmt)
+        if result.scalar_one_or_none() is not None:
             return True
 
+    async def increment_column(self, name: str, deltas: dict[int, int]) -> None:
+        """
+        Method of adding deltas to a column of many objects with one
+        UPDATE ... FROM (VALUES ...), the rows are locked in the order of the IDs
+        """
+        if not deltas:
+            return
+        rows = values(
+            column("id", Integer), column("value", Integer), name="deltas"
+        ).data(sorted(deltas.items()))
+        target = getattr(self._model, name)
+        stmt = (
+            update(self._model)
+            .where(self._model.id == rows.c.id)  # type: ignore
+            .values({name: target + rows.c.value})
+            .execution_options(synchronize_session=False)
+        )
+        await self._session.execute(stmt)
+
+    async def set_column(self, name: str, data: dict[int, Any]) -> None:
+        """
+        Method of setting a column of many objects with one
+        UPDATE ... FROM (VALUES ...), the rows are locked in the order of the IDs
+        """
+        if not data:
+            return
+        target = getattr(self._model, name)
+        rows = values(
+            column("id", Integer), column("value", target.type), name="data"
+        ).data(sorted(data.items()))
+        stmt = (
+            update(self._model)
+            .where(self._model.id == rows.c.id)  # type: ignore
+            .values({name: rows.c.value})
+            .execution_options(synchronize_session=False)
+        )
+        await self._session.execute(stmt)
+
 
 class BaseUserRepository(BaseRepository[User], ABC):
     """An abstract user repository class"""
@@ -88,26 +170,120 @@ class BaseUserRepository(BaseRepository[User], ABC):
     async def get_user_by_username(self, username: str) -> User | None:
         raise NotImplementedError()
 
+    @abstractmethod
+    async def get_principal(self, name: str) -> RowMapping | None:
+        raise NotImplementedError()
+
 
 class BasePostRepository(BaseRepository[Post], ABC):
     """An abstract post repository class"""
 
+    @abstractmethod
+    async def list(
+        self,
+        specification: Specification,
+        cursor: str | None = None,
+        limit: int | None = None,
+        fields: Sequence[str] | None = None,
+        with_comments: int | None = None,
+    ) -> Sequence[dict]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def stream(
+        self, specification: Specification, batch_size: int
+    ) -> AsyncIterator[dict]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def delete_post(self, idd: int) -> Sequence[int] | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_post(self, idd: int) -> dict | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_many(self, ids: Sequence[int]) -> Sequence[dict]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def search(
+        self,
+        specification: SearchSpecification,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> Sequence[dict]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def publish_due(self, limit: int) -> Sequence[tuple[int, int]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def purge_trash(
+        self, retention: timedelta, limit: int
+    ) -> tuple[Sequence[int], int, Sequence[int]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_comment_counts(
+        self, after_id: int, limit: int
+    ) -> Sequence[tuple[int, int, int]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_recent_activity(
+        self, window: timedelta
+    ) -> Sequence[tuple[int, float, int]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def iter_recent_comments(
+        self, window: timedelta, batch_size: int
+    ) -> AsyncIterator[Sequence[tuple[int, float, int]]]:
+        raise NotImplementedError()
+
 
 class BaseFollowerRepository(BaseRepository[User], ABC):
     """An abstract follower repository class"""
 
     @abstractmethod
-    async def add_follower(self, username: str, added_username: str) -> bool | None:
+    async def add_follower(self, idd: int, added_username: str) -> bool | None:
         raise NotImplementedError()
 
     @abstractmethod
-    async def get_followers(self, idd: int) -> list[User]:
+    def iter_follower_emails(
+        self, idd: int, chunk_size: int
+    ) -> AsyncIterator[list[str]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def add_followers(self, idd: int, usernames: list[str]) -> dict[str, bool]:
         raise NotImplementedError()
 
     @abstractmethod
     async def delete_follower(
-        self, username: str, removed_username: str
-    ) -> bool | None:
+        self, idd: int, removed_username: str
+    ) -> tuple[int | None, bool]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def iter_follower_ids(self, idd: int, chunk_size: int) -> AsyncIterator[list[int]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def iter_follow_graph(self, chunk_size: int) -> AsyncIterator[dict]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def iter_suggestions(
+        self, chunk_size: int, limit: int
+    ) -> AsyncIterator[tuple[list[int], dict[int, dict[str, int]]]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_followed_among(self, idd: int, ids: list[int]) -> list[int]:
         raise NotImplementedError()
 
 
@@ -116,10 +292,54 @@ class BaseCommentRepository(BaseRepository[Comment], ABC):
 
     @abstractmethod
     async def get_comments(
-        self, specification: Specification, idd: int
+        self,
+        specification: Specification,
+        idd: int,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> list[Comment]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def stream_comments(
+        self, specification: Specification, idd: int, batch_size: int
+    ) -> AsyncIterator[Comment]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def set_approved(self, ids: list[int], approved: bool) -> list[int]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_subtree(
+        self, idd: int, per_parent: int | None = None
+    ) -> list[Comment]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_post_comments(
+        self,
+        post_id: int,
+        order: CommentOrder,
+        cursor: str | None = None,
+        limit: int | None = None,
     ) -> list[Comment]:
         raise NotImplementedError()
 
+    @abstractmethod
+    async def exists(self, idd: int) -> bool:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_karma(self, after_id: int, limit: int) -> Sequence[tuple[int, int]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_reply_counts(
+        self, after_id: int, limit: int
+    ) -> Sequence[tuple[int, int, int]]:
+        raise NotImplementedError()
+
 
 class BaseImageRepository(BaseRepository[Image], ABC):
     """An abstract image repository class"""
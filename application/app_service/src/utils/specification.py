@@ -1,6 +1,6 @@
 from abc import ABC
 
-from sqlalchemy import ColumnElement
+from sqlalchemy import ColumnElement, func
 
 from models.comments import Comment
 from models.posts import Post
@@ -39,3 +39,16 @@ class IsTypeSpecification(Specification):
         if self.type_name:
             return Comment.type == self.type_name
         return True
+
+
+class SearchSpecification(Specification):
+    """Class specification for full-text search over posts"""
+
+    def __init__(self, query: str) -> None:
+        self.query = func.websearch_to_tsquery("english", query)
+
+    def is_satisfied(self) -> ColumnElement[bool] | bool:
+        return Post.search_vector.bool_op("@@")(self.query)
+
+    def rank(self) -> ColumnElement[float]:
+        return func.ts_rank_cd(Post.search_vector, self.query)
@@ -0,0 +1,52 @@
+from aioredis import Redis
+
+from db.redis_config import redis
+
+
+class RedisSuggestions:
+    """
+    A class that keeps precomputed suggestions of every user in a redis sorted
+    set of usernames scored by the number of mutual connections
+    """
+
+    def __init__(self, redis_cli: Redis, prefix: str) -> None:
+        self.redis = redis_cli
+        self.prefix = prefix
+
+    def _key(self, idd: int) -> str:
+        return f"{self.prefix}:{idd}"
+
+    async def replace(
+        self, ids: list[int], suggestions: dict[int, dict[str, int]]
+    ) -> None:
+        """
+        The method of replacing the suggestions of a batch of users at once,
+        the users without suggestions lose the old ones
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for idd in ids:
+                pipe.delete(self._key(idd))
+                if suggestions.get(idd):
+                    pipe.zadd(self._key(idd), suggestions[idd])
+            await pipe.execute()
+
+    async def remove(self, idd: int, usernames: list[str]) -> None:
+        """The method of dropping the users that were followed since the last run"""
+        if usernames:
+            await self.redis.zrem(self._key(idd), *usernames)
+
+    async def get(self, idd: int, limit: int) -> list[dict]:
+        """The method of getting the best suggestions of a user"""
+        entries = await self.redis.zrevrange(
+            self._key(idd), 0, limit - 1, withscores=True
+        )
+        return [
+            {
+                "username": name.decode() if isinstance(name, bytes) else name,
+                "mutual": int(score),
+            }
+            for name, score in entries
+        ]
+
+
+USER_SUGGESTIONS = RedisSuggestions(redis, "suggestions:users")
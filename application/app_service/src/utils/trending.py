@@ -0,0 +1,103 @@
+import math
+
+import numpy as np
+from aioredis import Redis
+
+from db.redis_config import redis
+
+
+def view_scores(
+    posts: np.ndarray, half_life: float, view_weight: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Scoring posts by their views. The posts are rows of (id, age, views), ages
+    are in seconds. Every post gets a weight that grows with its views and halves
+    every half_life seconds. Returns the sorted IDs and their scores
+    """
+    posts = posts[np.argsort(posts[:, 0])]
+    ids = posts[:, 0].astype(np.int64)
+    decay = math.log(2) / half_life
+    scores = view_weight * np.log1p(posts[:, 2]) * np.exp(-decay * posts[:, 1])
+    return ids, scores
+
+
+def add_comment_scores(
+    ids: np.ndarray,
+    scores: np.ndarray,
+    comments: np.ndarray,
+    half_life: float,
+    karma_weight: float,
+) -> None:
+    """
+    Adding the weights of a chunk of comments to the scores of the posts in place.
+    The comments are rows of (post id, age, karma), every comment adds a weight
+    that grows with its karma and halves every half_life seconds
+    """
+    if not len(ids) or not len(comments):
+        return
+    decay = math.log(2) / half_life
+    post_ids = comments[:, 0].astype(np.int64)
+    index = np.minimum(np.searchsorted(ids, post_ids), len(ids) - 1)
+    # Comments of posts published after the posts were read are skipped
+    known = ids[index] == post_ids
+    weights = 1 + karma_weight * np.log1p(np.maximum(comments[known, 2], 0))
+    weights *= np.exp(-decay * comments[known, 1])
+    scores += np.bincount(index[known], weights=weights, minlength=len(ids))
+
+
+def top_scores(ids: np.ndarray, scores: np.ndarray, size: int) -> dict[int, float]:
+    """Taking the best size posts with their scores"""
+    if len(scores) > size:
+        best = np.argpartition(scores, -size)[-size:]
+        ids, scores = ids[best], scores[best]
+    return dict(zip(ids.tolist(), scores.tolist()))
+
+
+def trending_scores(
+    posts: np.ndarray,
+    comments: np.ndarray,
+    half_life: float,
+    karma_weight: float,
+    view_weight: float,
+    size: int,
+) -> dict[int, float]:
+    """
+    Scoring posts by their recent activity at once. The posts are rows of
+    (id, age, views) and the comments are rows of (post id, age, karma).
+    Returns the best size posts with their scores
+    """
+    if not len(posts):
+        return {}
+    ids, scores = view_scores(posts, half_life, view_weight)
+    add_comment_scores(ids, scores, comments, half_life, karma_weight)
+    return top_scores(ids, scores, size)
+
+
+class RedisRanking:
+    """
+    A class that keeps a precomputed ranking of objects in a redis sorted set,
+    the whole ranking is replaced at once so readers never see a partial one
+    """
+
+    def __init__(self, redis_cli: Redis, key: str) -> None:
+        self.redis = redis_cli
+        self.key = key
+        self.building_key = f"{key}:building"
+
+    async def replace(self, scores: dict[int, float]) -> None:
+        """The method of replacing the ranking with new scores"""
+        if not scores:
+            await self.redis.delete(self.key)
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self.building_key)
+            pipe.zadd(self.building_key, scores)
+            pipe.rename(self.building_key, self.key)
+            await pipe.execute()
+
+    async def top(self, limit: int) -> list[int]:
+        """The method of getting the IDs of the best ranked objects"""
+        return [int(idd) for idd in await self.redis.zrevrange(self.key, 0, limit - 1)]
+
+
+TRENDING_POSTS = RedisRanking(redis, "posts:trending")
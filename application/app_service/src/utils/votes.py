@@ -0,0 +1,78 @@
+from typing import Iterable
+
+from aioredis import Redis
+
+from db.redis_config import redis
+from utils.counters import COMMENT_KARMA_COUNTER, RedisCounterBuffer
+
+# Replaces the vote of a voter and buffers the change of the score atomically,
+# so repeated votes never count twice
+VOTE_SCRIPT = """
+local previous = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+local vote = tonumber(ARGV[2])
+if vote == previous then
+    return 0
+end
+if vote == 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+else
+    redis.call('HSET', KEYS[1], ARGV[1], vote)
+end
+redis.call('HINCRBY', KEYS[2], ARGV[3], vote - previous)
+return vote - previous
+"""
+
+# Sums the votes of every object, so the totals are computed next to the data
+TOTALS_SCRIPT = """
+local totals = {}
+for i, key in ipairs(KEYS) do
+    local total = 0
+    for _, vote in ipairs(redis.call('HVALS', key)) do
+        total = total + tonumber(vote)
+    end
+    totals[i] = total
+end
+return totals
+"""
+
+
+class RedisVotes:
+    """
+    A class that keeps the votes of objects in redis hashes, one hash per object
+    with a field per voter, and buffers the changes of the scores
+    """
+
+    def __init__(
+        self, redis_cli: Redis, prefix: str, buffer: RedisCounterBuffer
+    ) -> None:
+        self.redis = redis_cli
+        self.prefix = prefix
+        self.buffer = buffer
+        self.script = redis_cli.register_script(VOTE_SCRIPT)
+        self.totals_script = redis_cli.register_script(TOTALS_SCRIPT)
+
+    async def vote(self, idd: int, voter: int, vote: int) -> int:
+        """
+        The method of voting for an object, a vote of 0 withdraws the vote.
+        Returns the change of the score
+        """
+        return await self.script(
+            keys=[f"{self.prefix}:{idd}", self.buffer.key], args=[voter, vote, idd]
+        )
+
+    async def totals(self, ids: Iterable[int]) -> dict[int, int]:
+        """The method of getting the sums of the votes of objects"""
+        ids = list(ids)
+        if not ids:
+            return {}
+        totals = await self.totals_script(keys=[f"{self.prefix}:{idd}" for idd in ids])
+        return dict(zip(ids, totals))
+
+    async def forget(self, ids: Iterable[int]) -> None:
+        """The method of dropping the votes of deleted objects"""
+        keys = [f"{self.prefix}:{idd}" for idd in ids]
+        if keys:
+            await self.redis.delete(*keys)
+
+
+COMMENT_VOTES = RedisVotes(redis, "votes:comments", COMMENT_KARMA_COUNTER)
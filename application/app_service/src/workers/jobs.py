@@ -0,0 +1,117 @@
+import asyncio
+
+from db.db_config import async_session
+from env_config import settings
+from log_config import add_logger
+from services.feed import FeedService
+from services.followers import FollowerService
+from services.comments import CommentService
+from services.posts import PostService
+from workers.metrics import PURGED_ROWS, PURGE_BATCH_SECONDS
+
+logger = add_logger(__name__)
+
+
+async def flush_comment_counters() -> None:
+    """A job that adds the buffered comment counts to the posts"""
+    async with async_session() as session:
+        updated = await PostService(session).flush_comment_counters()
+    logger.info("Comment counters of %s posts were flushed", updated)
+
+
+async def flush_reply_counters() -> None:
+    """A job that adds the buffered reply counts to the comments"""
+    async with async_session() as session:
+        updated = await CommentService(session).flush_reply_counters()
+    logger.info("Reply counters of %s comments were flushed", updated)
+
+
+async def flush_karma_counters() -> None:
+    """A job that adds the karma deltas of the buffered votes to the comments"""
+    async with async_session() as session:
+        updated = await CommentService(session).flush_karma_counters()
+    logger.info("Karma of %s comments was flushed", updated)
+
+
+async def reconcile_comment_counters() -> None:
+    """A job that repairs the drift of the comment counters"""
+    async with async_session() as session:
+        repaired = await PostService(session).reconcile_comment_counters()
+    logger.info("Comment counters of %s posts were repaired", repaired)
+
+
+async def reconcile_reply_counters() -> None:
+    """A job that repairs the drift of the reply counters"""
+    async with async_session() as session:
+        repaired = await CommentService(session).reconcile_reply_counters()
+    logger.info("Reply counters of %s comments were repaired", repaired)
+
+
+async def reconcile_karma() -> None:
+    """A job that repairs the drift of the karma of the comments"""
+    async with async_session() as session:
+        repaired = await CommentService(session).reconcile_karma()
+    logger.info("Karma of %s comments was repaired", repaired)
+
+
+async def flush_view_counts() -> None:
+    """A job that persists the numbers of unique views of the posts"""
+    async with async_session() as session:
+        updated = await PostService(session).flush_view_counts()
+    logger.info("View counts of %s posts were flushed", updated)
+
+
+async def rank_trending_posts() -> None:
+    """A job that recomputes the ranking of the trending posts"""
+    async with async_session() as session:
+        ranked = await PostService(session).rank_trending_posts()
+    logger.info("%s trending posts were ranked", ranked)
+
+
+async def rebuild_follow_lists() -> None:
+    """A job that repopulates the follow lists in redis from the database"""
+    async with async_session() as session:
+        rebuilt = await FollowerService(session).rebuild_follow_lists()
+    logger.info("Follow lists of %s users were rebuilt", rebuilt)
+
+
+async def compute_suggestions() -> None:
+    """A job that recomputes the suggestions of whom to follow"""
+    async with async_session() as session:
+        suggested = await FollowerService(session).compute_suggestions()
+    logger.info("Suggestions for %s users were computed", suggested)
+
+
+async def publish_due_posts() -> None:
+    """A job that publishes the scheduled posts and notifies the followers"""
+    async with async_session() as session, async_session() as fanout_session:
+        published = await PostService(session).publish_due_posts(
+            FollowerService(fanout_session), FeedService(fanout_session)
+        )
+    logger.info("%s scheduled posts were published", published)
+
+
+async def purge_trash() -> None:
+    """
+    A job that hard-deletes old trashed posts in short batches with a pause
+    between them, so that live traffic is never blocked for long
+    """
+    total = 0
+    while True:
+        async with async_session() as session:
+            with PURGE_BATCH_SECONDS.time():
+                posts, images, comments = await PostService(session).purge_trash_batch()
+        PURGED_ROWS.labels("posts").inc(posts)
+        PURGED_ROWS.labels("images").inc(images)
+        PURGED_ROWS.labels("comments").inc(comments)
+        total += posts
+        logger.info(
+            "Purge batch deleted %s posts, %s images and %s comments, %s posts in total",
+            posts,
+            images,
+            comments,
+            total,
+        )
+        if posts < settings.worker.purge_batch_size:
+            return
+        await asyncio.sleep(settings.worker.purge_batch_pause)
@@ -0,0 +1,49 @@
+import asyncio
+import sys
+from typing import Awaitable, Callable
+
+from prometheus_client import start_http_server
+
+from env_config import settings
+from log_config import add_logger
+from workers import jobs
+
+logger = add_logger(__name__)
+
+JOBS: list[tuple[Callable[[], Awaitable[None]], int]] = [
+    (jobs.flush_comment_counters, settings.worker.counters_flush_interval),
+    (jobs.flush_reply_counters, settings.worker.counters_flush_interval),
+    (jobs.flush_karma_counters, settings.worker.counters_flush_interval),
+    (jobs.reconcile_comment_counters, settings.worker.counters_reconcile_interval),
+    (jobs.reconcile_reply_counters, settings.worker.counters_reconcile_interval),
+    (jobs.reconcile_karma, settings.worker.counters_reconcile_interval),
+    (jobs.flush_view_counts, settings.worker.views_flush_interval),
+    (jobs.publish_due_posts, settings.worker.publish_interval),
+    (jobs.purge_trash, settings.worker.purge_interval),
+    (jobs.rank_trending_posts, settings.worker.trending_interval),
+    (jobs.rebuild_follow_lists, settings.worker.follow_lists_rebuild_interval),
+    (jobs.compute_suggestions, settings.worker.suggestions_interval),
+]
+
+
+async def run_periodically(job: Callable[[], Awaitable[None]], interval: int) -> None:
+    """Running a job again and again with a pause between the runs"""
+    while True:
+        try:
+            await job()
+        except Exception as exc:
+            logger.exception("Job %s was gotten failure %s", job.__name__, exc)
+        await asyncio.sleep(interval)
+
+
+async def main() -> None:
+    """The main function of the worker is to run the periodic jobs"""
+    start_http_server(settings.worker.metrics_port)
+    await asyncio.gather(*(run_periodically(job, interval) for job, interval in JOBS))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,8 @@
+from prometheus_client import Counter, Histogram
+
+PURGED_ROWS = Counter(
+    "purged_rows_total", "Rows hard-deleted by the trash purge", ["table"]
+)
+PURGE_BATCH_SECONDS = Histogram(
+    "purge_batch_seconds", "Duration of one batch of the trash purge"
+)
@@ -44,10 +44,16 @@ class SendEmailClient(RabbitMQClient):
         """A method that generates and sends data to the mail"""
         data = json.loads(body)
         user = data.get("user_id")
-        post = data.get("post_id")
+        posts = data.get("post_ids") or [data.get("post_id")]
         emails = data.get("emails")
+        if len(posts) == 1:
+            message = f"User {user} has added a new post № {posts[0]}"
+        else:
+            message = f"User {user} has added {len(posts)} new posts: " + ", ".join(
+                f"№ {post}" for post in posts
+            )
         sender_email = SenderEmail(
-            message=f"User {user} has added a new post № {post}",
+            message=message,
             email_from="admin@email.com",
             email_to=emails,
             subject="Hello my friend!",